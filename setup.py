@@ -4,11 +4,12 @@ setup(name='canvas',
       packages = find_namespace_packages(where="src"),
       package_dir = {"": "src"},
       package_data={
-          "canvas.patterns" : ["*.txt"],
+          "canvas.patterns" : ["*.txt", "*.pkl"],
           },
       install_requires=[
           'pyclipper',
           'ezdxf',
           'pycairo',
+          'numpy',
           ]
       )
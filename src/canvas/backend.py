@@ -1,8 +1,8 @@
 """Module for abstract class for backend used by Canvas to create output files."""
 
-from typing import Optional, Tuple, List, Union
+from typing import Optional, Tuple, List, Sequence, Union
 from abc import ABC, abstractmethod
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class LineType(Enum):
@@ -14,7 +14,7 @@ class LineType(Enum):
     DASH = 3
 
 
-class Color(Enum):
+class Color(IntEnum):
     """Colors used by canvas."""
 
     BLACK = 0
@@ -25,6 +25,10 @@ class Color(Enum):
     GRAY = 5
     GREEN = 6
 
+    def __bool__(self):
+        # backends check colors with `if color:`, so BLACK must stay truthy like Enum members
+        return True
+
 
 class Font(Enum):
     """Fonts used by canvas."""
@@ -51,6 +55,9 @@ class Backend(ABC):
 
     # pylint: disable=too-many-arguments
 
+    # empty slots let subclasses that define their own slots go without instance __dict__
+    __slots__ = ()
+
     def __pre_draw__(self):
         """Called before drawing elements to file."""
 
@@ -111,7 +118,7 @@ class Backend(ABC):
         """Draw lines.
 
         Args:
-            points: list of line nodes.
+            points: list of line nodes or numpy array of shape (N, 2).
             color: the color of the line.
             width: thickness of the line.
             line_type: recieves `LineType` value.
@@ -122,6 +129,37 @@ class Backend(ABC):
             transparency: Transparency of the layer.
         """
 
+    def draw_lines_bulk(
+        self,
+        lines: Sequence[Tuple[Tuple[float, float]]],
+        color: Color = Color.BLACK,
+        width: float = 0.3,
+        line_type: LineType = LineType.SOLID,
+        transparency: Optional[float] = None,
+        layer_name: Optional[str] = None,
+    ):
+        """Draw several lines sharing the same style.
+
+        Backends override it to set up the style once for all lines.
+
+        Args:
+            lines: list of lines, each one is given as in `draw_lines`.
+            color: the color of the lines.
+            width: thickness of the lines.
+            line_type: recieves `LineType` value.
+            transparency: Transparency of the layer.
+            layer_name: the name of the layer to draw lines in.
+        """
+        for points in lines:
+            self.draw_lines(
+                points,
+                color=color,
+                width=width,
+                line_type=line_type,
+                transparency=transparency,
+                layer_name=layer_name,
+            )
+
     @abstractmethod
     def draw_circle(
         self,
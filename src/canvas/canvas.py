@@ -1,16 +1,15 @@
 """Модуль отвечающий непосредственно за холст на котором рисуется разрез."""
 
 import os
+from contextlib import contextmanager
 from enum import Enum
-
-import pyclipper
+from functools import wraps
+from importlib import import_module
 
 from .logger import logger
 
+from .clipping import ClipBatch, clip_lines
 from .exceptions import CanvasException
-from .dxf import CanvasDxf
-from .pdf_via_cairo import CanvasCairo
-from .png import CanvasPng
 
 # flake8: noqa
 from .backend import Backend, LineType, Color, TextAligment  # pylint: disable=unused-import
@@ -23,35 +22,43 @@ class OutputType(str, Enum):
     png = "png"
 
 
+# module and class name of backend for each output type, imported on first use
 BACKENDS = {
-    OutputType.dxf: CanvasDxf,
-    OutputType.pdf: CanvasCairo,
-    OutputType.png: CanvasPng,
+    OutputType.dxf: ("dxf", "CanvasDxf"),
+    OutputType.pdf: ("pdf_via_cairo", "CanvasCairo"),
+    OutputType.png: ("png", "CanvasPng"),
 }
 
 
+def get_backend_class(output_type: OutputType):
+    """Imports and returns class of backend used for given output type."""
+    module_name, class_name = BACKENDS[output_type]
+    module = import_module(f".{module_name}", __package__)
+    return getattr(module, class_name)
+
+
 def clip_lines_with_polygon(func):
     """Function wrapper for draw lines.
 
     Clips all lines inside given polygon and draws only those lines that are inside this polygon.
-    """
+    While canvas is drawing its units, lines are collected by `Canvas.clip_batch` and clipped
+    together.
 
-    def wrapper(canvas, polygon, points, **kwargs):
-        # scale_up points from float to int that is needed for coorect work of pyclipper
-        points = pyclipper.scale_to_clipper(points)
-        polygon = pyclipper.scale_to_clipper(polygon)
-
-        # clip line given by points
-        clipper = pyclipper.Pyclipper()
-        clipper.AddPath(polygon, pyclipper.PT_CLIP)
-        clipper.AddPath(points, pyclipper.PT_SUBJECT, False)
+    Wrapped function is called as `func(self, polygon, points, **kwargs)` but receives the list
+    of clipped lines instead of points to draw them at once.
+    """
 
-        solution = clipper.Execute2(pyclipper.CT_INTERSECTION)
-        solution = pyclipper.PolyTreeToPaths(solution)
-        solution = pyclipper.scale_from_clipper(solution)
+    @wraps(func)
+    def wrapper(owner, polygon, points, **kwargs):
+        canvas = owner if isinstance(owner, Canvas) else owner.canvas
+        batch = getattr(canvas, "_clip_batch", None)
+        if batch is not None:
+            batch.add(func, owner, polygon, points, kwargs)
+            return
 
-        for line in solution:
-            func(canvas, polygon, line, **kwargs)
+        lines = clip_lines(polygon, [points])
+        if lines:
+            func(owner, polygon, lines, **kwargs)
 
     return wrapper
 
@@ -61,40 +68,81 @@ class Canvas:
 
     _width_in_mm = None
     _height_in_mm = None
+    _clip_batch = None
 
     def __init__(self, page, output_file, output_type: OutputType = OutputType.png):
         self.page = page
         self.units = dict()
-        self.backend = BACKENDS[output_type](output_file)
+        self._name_counts = dict()
+        self.backend = get_backend_class(output_type)(output_file)
+
+        if not (self._width_in_mm and self._height_in_mm):
+            width_in_mm, height_in_mm = SIZES[page]
+            self._width_in_mm = self._width_in_mm or width_in_mm
+            self._height_in_mm = self._height_in_mm or height_in_mm
+        self.backend.width_in_mm = self._width_in_mm
+        self.backend.height_in_mm = self._height_in_mm
+
+        # bound methods of backend used by draw_*_canvas_mm for every drawn element
+        self._draw_lines = self.backend.draw_lines
+        self._draw_lines_bulk = self.backend.draw_lines_bulk
+        self._draw_text = self.backend.draw_text
+        self._draw_rectangle = self.backend.draw_rectangle
+        self._draw_circle = self.backend.draw_circle
+        self._draw_table = self.backend.draw_table
 
     @property
     def width_in_mm(self):
         """Width of the page in mm."""
-        if self._width_in_mm:
-            return self._width_in_mm
-        return SIZES[self.page][0]
+        return self._width_in_mm
 
     @property
     def height_in_mm(self):
         """Height of the page in mm."""
-        if self._height_in_mm:
-            return self._height_in_mm
-        return SIZES[self.page][1]
+        return self._height_in_mm
 
     @clip_lines_with_polygon
-    def draw_lines_inside_polygon(self, polygon, points, **kwargs):
+    def draw_lines_inside_polygon(self, polygon, lines, **kwargs):
         """Draw line inside given polygon."""
         # pylint: disable=unused-argument
-        self.draw_lines_canvas_mm(points, **kwargs)
+        self.draw_lines_canvas_mm_bulk(lines, **kwargs)
+
+    @contextmanager
+    def clip_batch(self):
+        """Collect lines drawn inside polygons to clip them in batches.
+
+        Queued lines are drawn before any other element, so the order of drawing is kept.
+        """
+        if self._clip_batch is not None:
+            yield self._clip_batch
+            return
+
+        self._clip_batch = ClipBatch()
+        try:
+            yield self._clip_batch
+        finally:
+            batch, self._clip_batch = self._clip_batch, None
+            batch.flush()
+
+    def _flush_clip_batch(self):
+        """Draws lines waiting in the clip batch."""
+        batch = self._clip_batch
+        if batch:
+            batch.flush()
 
     def add(self, unit, name=None):
         """Добавляет на разрез элемент разреза (CanvasUnit)."""
 
-        unit_name = name or unit.name
-        while True:
-            if unit_name not in self.units:
-                break
-            unit_name = unit_name + "+"
+        # duplicates are named "<name>+", "<name>++" and so on, the number of pluses of the last
+        # one is kept to not try all the names before it
+        base_name = name or unit.name
+        count = self._name_counts.get(base_name, 0)
+        unit_name = base_name + "+" * count
+        while unit_name in self.units:
+            # name was taken by a unit added explicitly with such a name
+            count += 1
+            unit_name += "+"
+        self._name_counts[base_name] = count + 1
 
         self.units[unit_name] = unit
         unit.canvas = self
@@ -109,56 +157,65 @@ class Canvas:
 
         Coordinates starts from bottom left part of the canvas.
         """
-        self.backend.draw_lines([point0, point1], **kwargs)
+        self._flush_clip_batch()
+        self._draw_lines([point0, point1], **kwargs)
 
     def draw_lines_canvas_mm(self, points, **kwargs):
         """Draws line on canvas in coordinates given in mm.
 
         Coordinates starts from bottom left part of the canvas.
         """
-        self.backend.draw_lines(points, **kwargs)
+        self._flush_clip_batch()
+        self._draw_lines(points, **kwargs)
+
+    def draw_lines_canvas_mm_bulk(self, lines, **kwargs):
+        """Draws several lines with the same style on canvas in coordinates given in mm."""
+        self._flush_clip_batch()
+        self._draw_lines_bulk(lines, **kwargs)
 
     def draw_text_canvas_mm(self, x, y, text, **kwargs):
         """Draws text on canvas with coordinates given in mm."""
-        self.backend.draw_text((x, y), text, **kwargs)
+        self._flush_clip_batch()
+        self._draw_text((x, y), text, **kwargs)
 
     def draw_rectangle_canvas_mm(self, point0, size, **kwargs):
         """Draws rectangle on canvas with coordinates given in mm."""
-        self.backend.draw_rectangle(point0, size, **kwargs)
+        self._flush_clip_batch()
+        self._draw_rectangle(point0, size, **kwargs)
 
     def draw_circle_canvas_mm(self, center, radius, **kwargs):
         """Draws a circle on canvas with coordinates given in mm."""
-        self.backend.draw_circle(center=center, radius=radius, **kwargs)
+        self._flush_clip_batch()
+        self._draw_circle(center=center, radius=radius, **kwargs)
 
     def draw_table_canvas_mm(self, origin, table, **kwargs):
         """Draws table on canvas with coordinates given in mm."""
+        self._flush_clip_batch()
         dimention = len(table), len(table[0])
-        self.backend.draw_table(origin=origin, dimensions=dimention, values=table, **kwargs)
+        self._draw_table(origin=origin, dimensions=dimention, values=table, **kwargs)
 
     def draw_units(self):
-        """Draws all units in self using self backend."""
+        """Draws all units in self using self backend.
 
-        # pylint: disable=bare-except
-        # pylint: disable=W0703
-
-        self.backend.widht_in_mm = self.width_in_mm
-        self.backend.width_in_mm = self.width_in_mm
-        self.backend.height_in_mm = self.height_in_mm
+        Units that raise `CanvasException` are logged and skipped, any other error is propagated.
+        """
         self.backend.__pre_draw__()
 
-        for _, unit in self.units.items():
-            try:
-                logger.info(f'Обработка элемента разреза "{unit.name}"')
-                unit.__draw__()
-            except CanvasException as exception:
-                logger.exception(exception)
-                logger.info(exception)
-            except BaseException as e:
-                print(e)
-                raise
-                # logger.exception(f"Ошибка при построении разреза {unit.name}")
-                # logger.info(f"Ошибка при построении элемента разреза {unit.name}")
-                # logger.info("Элемент не будет построен на разрезе")
+        log_info = logger.info
+        log_exception = logger.exception
+        with self.clip_batch() as batch:
+            for _, unit in self.units.items():
+                try:
+                    log_info(f'Обработка элемента разреза "{unit.name}"')
+                    try:
+                        unit.__draw__()
+                    finally:
+                        # lines queued by the unit are drawn with its current origin and scales
+                        # and errors of clipping them are reported for this unit
+                        batch.flush()
+                except CanvasException as exception:
+                    log_exception(exception)
+                    log_info(exception)
 
     def place_units(self):
         """Call __place__ for each unit."""
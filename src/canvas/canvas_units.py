@@ -4,7 +4,39 @@ from dataclasses import dataclass
 from typing import Optional, Type
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from .canvas import Canvas, Color, clip_lines_with_polygon
+from .clipping import clip_lines
+
+_RED = Color.RED
+_WHITE = Color.WHITE
+
+# lines with fewer nodes are transformed in Python as numpy call overhead outweighs its benefit
+SMALL_LINE_SIZE = 8
+
+
+def transform_lines(lines, offset, scale=(1, 1)):
+    """Offsets and then scales nodes of all lines at once.
+
+    Returns:
+        List of lines given as lists of [x, y] nodes. Nodes are converted from numpy once for all
+        lines, as backends iterate over the nodes of each line in Python.
+    """
+    if not len(lines):
+        return []
+    nodes = np.concatenate([np.asarray(points, dtype=np.float64).reshape(-1, 2) for points in lines])
+    nodes += offset
+    nodes *= scale
+    nodes = nodes.tolist()
+
+    transformed = []
+    start = 0
+    for points in lines:
+        end = start + len(points)
+        transformed.append(nodes[start:end])
+        start = end
+    return transformed
 
 
 class CanvasUnitFloating(ABC):
@@ -48,14 +80,34 @@ class CanvasUnitFloating(ABC):
 
     def draw_lines(self, points, **kwargs):
         """Draws line on subplot in coordinates given in mm."""
-        points = [self.point_from_origin(*point) for point in points]
+        # points may be given by an iterator, they are collected before being counted
+        if not isinstance(points, (list, tuple, np.ndarray)):
+            points = list(points)
+        if len(points) <= SMALL_LINE_SIZE and not isinstance(points, np.ndarray):
+            x0, y0 = self.origin
+            points = [(x0 + x, y0 + y) for x, y in points]
+        else:
+            # backends receive list of (x, y) tuples whatever way the nodes are transformed
+            nodes = np.asarray(points, dtype=np.float64).reshape(-1, 2) + self.origin
+            points = list(map(tuple, nodes.tolist()))
         self.canvas.draw_lines_canvas_mm(points, **kwargs)
 
+    def draw_lines_bulk(self, lines, **kwargs):
+        """Draws several lines with the same style on subplot in coordinates given in mm."""
+        lines = transform_lines(lines, offset=self.origin)
+        self.canvas.draw_lines_canvas_mm_bulk(lines, **kwargs)
+
     @clip_lines_with_polygon
-    def draw_lines_inside_polygon(self, polygon, points, **kwargs):
+    def draw_lines_inside_polygon(self, polygon, lines, **kwargs):
         """Draw line inside given polygon."""
         # pylint: disable=unused-argument
-        self.draw_lines(points, **kwargs)
+        self.draw_lines_bulk(lines, **kwargs)
+
+    def draw_lines_inside_polygon_bulk(self, polygon, lines, **kwargs):
+        """Draws several lines with the same style inside given polygon."""
+        lines = clip_lines(polygon, lines)
+        if lines:
+            self.draw_lines_bulk(lines, **kwargs)
 
     def draw_text(self, x, y, text, **kwargs):
         """Draws text on subplot with coordinates given in mm."""
@@ -88,7 +140,7 @@ class CanvasUnitFloating(ABC):
                 (self.right, self.bottom),
                 (self.left, self.bottom),
             ),
-            color=Color.RED,
+            color=_RED,
         )
 
     def point_from_origin(self, x, y):
@@ -100,9 +152,9 @@ class CanvasUnitFloating(ABC):
         """Returns x, y coordinates based on x_fraction, y_fraction."""
         return self.width_mm * x_fraction, self.height_mm * y_fraction
 
-    def draw_background(self, color=Color.WHITE):
+    def draw_background(self, color=_WHITE):
         """Draws white background using origin and width of the unit."""
-        if color == Color.WHITE:
+        if color == _WHITE:
             self.draw_rectangle((0, 0), (self.width_mm, self.height_mm), fill_rgb=(255, 255, 255))
         else:
             self.draw_rectangle((0, 0), (self.width_mm, self.height_mm), fill_color=color)
@@ -169,6 +221,20 @@ class CanvasUnitScaled(CanvasUnitFloating):
         y = self.scale_vertical_mm * (y + self.y_offset_m)
         return x, y
 
+    def scale_points(self, points):
+        """Returns list of points scaled respecting horizontal and vertical scales.
+
+        Many points are scaled at once with numpy, the result is the same as of `scale`.
+        """
+        if not isinstance(points, (list, tuple, np.ndarray)):
+            points = list(points)
+        if len(points) <= SMALL_LINE_SIZE and not isinstance(points, np.ndarray):
+            return [self.scale(x, y) for x, y in points]
+        nodes = np.array(points, dtype=np.float64).reshape(-1, 2)
+        nodes += (self.x_offset_m, self.y_offset_m)
+        nodes *= (self.scale_horizontal_mm, self.scale_vertical_mm)
+        return list(map(tuple, nodes.tolist()))
+
     def mm_to_m_horizontal(self, mm):
         """Converts mm to m based on horizontal scale."""
         return mm / self.scale_horizontal_mm
@@ -193,14 +259,36 @@ class CanvasUnitScaled(CanvasUnitFloating):
 
     def draw_lines_m(self, points, **kwargs):
         """Draws line on subplot in coordinates given in mm."""
-        points = [self.scale(*point) for point in points]
+        if not isinstance(points, (list, tuple, np.ndarray)):
+            points = list(points)
+        if len(points) <= SMALL_LINE_SIZE and not isinstance(points, np.ndarray):
+            points = [self.scale(x, y) for x, y in points]
+        else:
+            points = np.array(points, dtype=np.float64).reshape(-1, 2)
+            points += (self.x_offset_m, self.y_offset_m)
+            points *= (self.scale_horizontal_mm, self.scale_vertical_mm)
         self.draw_lines(points, **kwargs)
 
+    def draw_lines_m_bulk(self, lines, **kwargs):
+        """Draws several lines with the same style on subplot in coordinates given in m."""
+        lines = transform_lines(
+            lines,
+            offset=(self.x_offset_m, self.y_offset_m),
+            scale=(self.scale_horizontal_mm, self.scale_vertical_mm),
+        )
+        self.draw_lines_bulk(lines, **kwargs)
+
     @clip_lines_with_polygon
-    def draw_lines_m_inside_polygon(self, polygon, points, **kwargs):
+    def draw_lines_m_inside_polygon(self, polygon, lines, **kwargs):
         """Draw line inside given polygon."""
         # pylint: disable=unused-argument
-        self.draw_lines_m(points, **kwargs)
+        self.draw_lines_m_bulk(lines, **kwargs)
+
+    def draw_lines_m_inside_polygon_bulk(self, polygon, lines, **kwargs):
+        """Draws several lines with the same style inside given polygon in coordinates given in m."""
+        lines = clip_lines(polygon, lines)
+        if lines:
+            self.draw_lines_m_bulk(lines, **kwargs)
 
     def draw_text_m(self, x, y, text, **kwargs):
         """Draws text on subplot with coordinates given in mm."""
@@ -237,7 +325,7 @@ class CanvasUnitLinked(CanvasUnitScaled):
     def __post_init__(self):
         """Sets scales, offsets and origin from linked_cu to self."""
         self.scale_horizontal = self.linked_cu.scale_horizontal
-        self.scale_vertical = self.linked_cu.scale_horizontal
+        self.scale_vertical = self.linked_cu.scale_vertical
         self.scale_horizontal_mm = self.linked_cu.scale_horizontal_mm
         self.scale_vertical_mm = self.linked_cu.scale_vertical_mm
         self.x_offset_m = self.linked_cu.x_offset_m
@@ -0,0 +1,382 @@
+"""Module with helpers to clip lines that are drawn inside polygons."""
+
+from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# default scale used by pyclipper.scale_to_clipper
+CLIPPER_SCALE = 2**31
+
+# number of lines clipped by one polygon above which the polygon is split into tiles
+TILING_THRESHOLD = 256
+TILES_PER_SIDE = 4
+
+
+class ClipPolygon(NamedTuple):
+    """Properties of clip polygon used to triage lines before clipping."""
+
+    bbox: Tuple[float, float, float, float]
+    edges: Tuple[Tuple[float, float, float, float], ...]
+    convex: bool
+    rectangle: bool
+    scaled: Optional[Tuple[Tuple[int, int], ...]]
+
+
+def get_polygon_key(polygon) -> Tuple[Tuple[float, float], ...]:
+    """Returns hashable key of polygon made of its coordinates.
+
+    Polygons given as lists, tuples or numpy arrays with the same coordinates have equal keys.
+    """
+    return tuple(map(tuple, polygon))
+
+
+def get_clip_polygon(polygon) -> ClipPolygon:
+    """Returns memoized `ClipPolygon` for given polygon.
+
+    Polygon is memoized by its coordinates, so a list mutated in place is never mistaken for
+    the polygon it held before.
+    """
+    return _create_clip_polygon(get_polygon_key(polygon))
+
+
+@lru_cache(maxsize=256)
+def _create_clip_polygon(points) -> ClipPolygon:
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    bbox = min(xs), min(ys), max(xs), max(ys)
+
+    edges = tuple(
+        (x1, y1, x2, y2)
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])
+        if (x1, y1) != (x2, y2)
+    )
+
+    signs = set()
+    for (ax, ay, bx, by), (_, _, cx, cy) in zip(edges, edges[1:] + edges[:1]):
+        cross = (bx - ax) * (cy - by) - (by - ay) * (cx - bx)
+        if cross:
+            signs.add(cross > 0)
+    rectangle = (
+        len(edges) == 4
+        and len(set(xs)) == 2
+        and len(set(ys)) == 2
+        and all(x1 == x2 or y1 == y2 for x1, y1, x2, y2 in edges)
+    )
+    scaled = None
+    if not rectangle:
+        # pylint: disable=import-outside-toplevel
+        import pyclipper
+
+        # scale_up points from float to int that is needed for coorect work of pyclipper
+        scaled = tuple(map(tuple, pyclipper.scale_to_clipper(points)))
+
+    return ClipPolygon(
+        bbox=bbox,
+        edges=edges,
+        convex=len(signs) == 1,
+        rectangle=rectangle,
+        scaled=scaled,
+    )
+
+
+def point_in_polygon(x, y, edges) -> bool:
+    """Checks if point is inside polygon given by its edges using crossing number."""
+    inside = False
+    for x1, y1, x2, y2 in edges:
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+
+_INSIDE, _LEFT, _RIGHT, _BOTTOM, _TOP = 0, 1, 2, 4, 8
+
+
+def _outcode(x, y, xmin, ymin, xmax, ymax):
+    code = _INSIDE
+    if x < xmin:
+        code |= _LEFT
+    elif x > xmax:
+        code |= _RIGHT
+    if y < ymin:
+        code |= _BOTTOM
+    elif y > ymax:
+        code |= _TOP
+    return code
+
+
+def _is_on_border(x0, y0, x1, y1, bbox) -> bool:
+    """Checks if segment lies on a side of the rectangle, a single point counts as a segment."""
+    # pylint: disable=too-many-arguments
+    xmin, ymin, xmax, ymax = bbox
+    return (x0 == x1 and x0 in (xmin, xmax)) or (y0 == y1 and y0 in (ymin, ymax))
+
+
+def clip_segment_with_rectangle(x0, y0, x1, y1, bbox):
+    """Clip segment with axis-aligned rectangle using Cohen–Sutherland algorithm.
+
+    As pyclipper, the sides of the rectangle are considered to be outside of it, so segments that
+    only touch the rectangle or lie on its side are dropped.
+
+    Args:
+        x0, y0, x1, y1: coordinates of the ends of the segment.
+        bbox: xmin, ymin, xmax, ymax of the rectangle.
+
+    Returns:
+        Coordinates of the ends of the clipped segment or None if segment is outside.
+    """
+    # pylint: disable=too-many-arguments
+    xmin, ymin, xmax, ymax = bbox
+    code0 = _outcode(x0, y0, xmin, ymin, xmax, ymax)
+    code1 = _outcode(x1, y1, xmin, ymin, xmax, ymax)
+
+    while True:
+        if not code0 | code1:
+            if _is_on_border(x0, y0, x1, y1, bbox):
+                return None
+            return x0, y0, x1, y1
+        if code0 & code1:
+            return None
+
+        code = code0 or code1
+        if code & _TOP:
+            x, y = x0 + (x1 - x0) * (ymax - y0) / (y1 - y0), ymax
+        elif code & _BOTTOM:
+            x, y = x0 + (x1 - x0) * (ymin - y0) / (y1 - y0), ymin
+        elif code & _RIGHT:
+            x, y = xmax, y0 + (y1 - y0) * (xmax - x0) / (x1 - x0)
+        else:
+            x, y = xmin, y0 + (y1 - y0) * (xmin - x0) / (x1 - x0)
+
+        if code == code0:
+            x0, y0 = x, y
+            code0 = _outcode(x0, y0, xmin, ymin, xmax, ymax)
+        else:
+            x1, y1 = x, y
+            code1 = _outcode(x1, y1, xmin, ymin, xmax, ymax)
+
+
+def clip_line_with_rectangle(points, bbox):
+    """Clip polyline with axis-aligned rectangle.
+
+    Args:
+        points: nodes of the polyline.
+        bbox: xmin, ymin, xmax, ymax of the rectangle.
+
+    Returns:
+        List of parts of the polyline that are inside the rectangle. Parts that lie on the sides
+        of the rectangle or shrink to a point are dropped as pyclipper does.
+    """
+    if not len(points):
+        return []
+
+    xmin, ymin, xmax, ymax = bbox
+    parts = []
+    part = None
+
+    x0, y0 = points[0]
+    code0 = _outcode(x0, y0, xmin, ymin, xmax, ymax)
+    for x1, y1 in points[1:]:
+        code1 = _outcode(x1, y1, xmin, ymin, xmax, ymax)
+
+        if code0 & code1:
+            segment = None
+        elif not code0 | code1:
+            # the whole segment is inside, no need to clip it
+            segment = None if _is_on_border(x0, y0, x1, y1, bbox) else (x0, y0, x1, y1)
+        else:
+            segment = clip_segment_with_rectangle(x0, y0, x1, y1, bbox)
+
+        if segment is None:
+            part = None
+        else:
+            start_x, start_y, end_x, end_y = segment
+            if part is None or code0:
+                part = [(start_x, start_y)]
+                parts.append(part)
+            part.append((end_x, end_y))
+            if code1:
+                part = None
+
+        x0, y0, code0 = x1, y1, code1
+    return [part for part in parts if any(point != part[0] for point in part[1:])]
+
+
+def clip_lines(polygon, lines):
+    """Clip lines with polygon.
+
+    Axis-aligned rectangles are clipped with `clip_line_with_rectangle`. For other polygons
+    lines that are entirely outside of the polygon bounding box are dropped and lines that are
+    entirely inside of convex polygon are returned as is. Only the rest of lines is clipped by
+    pyclipper, tile by tile if there are many of them. Lines of zero length are dropped, as
+    pyclipper does.
+
+    Args:
+        polygon: clip polygon.
+        lines: list of polylines to clip.
+
+    Returns:
+        List of parts of the lines that are inside the polygon.
+    """
+    clip_polygon = get_clip_polygon(polygon)
+    if clip_polygon.rectangle:
+        bbox = clip_polygon.bbox
+        return [part for line in lines for part in clip_line_with_rectangle(line, bbox)]
+
+    xmin, ymin, xmax, ymax = clip_polygon.bbox
+    edges = clip_polygon.edges
+
+    inside, straddling, straddling_bboxes = [], [], []
+    for line in lines:
+        xs = [x for x, _ in line]
+        ys = [y for _, y in line]
+        line_xmin, line_xmax, line_ymin, line_ymax = min(xs), max(xs), min(ys), max(ys)
+        if line_xmin == line_xmax and line_ymin == line_ymax:
+            continue
+        if line_xmax < xmin or line_xmin > xmax or line_ymax < ymin or line_ymin > ymax:
+            continue
+        if (
+            clip_polygon.convex
+            and xmin < line_xmin
+            and line_xmax < xmax
+            and ymin < line_ymin
+            and line_ymax < ymax
+            and all(point_in_polygon(x, y, edges) for x, y in zip(xs, ys))
+        ):
+            inside.append(line)
+        else:
+            straddling.append(line)
+            straddling_bboxes.append((line_xmin, line_ymin, line_xmax, line_ymax))
+
+    if not straddling:
+        return inside
+    if len(straddling) > TILING_THRESHOLD and xmin < xmax and ymin < ymax:
+        return inside + _clip_lines_by_tiles(clip_polygon, straddling, straddling_bboxes)
+    return inside + _clip_lines_with_pyclipper([clip_polygon.scaled], straddling)
+
+
+def _clip_lines_with_pyclipper(clip_paths, lines):
+    """Clip lines with polygons given in pyclipper integer coordinates."""
+    # pyclipper is imported only when a line has to be clipped by a polygon other than rectangle
+    # pylint: disable=import-outside-toplevel
+    import pyclipper
+
+    clipper = pyclipper.Pyclipper()
+    clipper.AddPaths(clip_paths, pyclipper.PT_CLIP, True)
+    clipper.AddPaths(pyclipper.scale_to_clipper(lines), pyclipper.PT_SUBJECT, False)
+
+    solution = clipper.Execute2(pyclipper.CT_INTERSECTION)
+    paths = pyclipper.PolyTreeToPaths(solution)
+    if not paths:
+        return []
+
+    # scale all nodes back at once and split them into views of the same array
+    nodes = np.concatenate(paths) / CLIPPER_SCALE
+    ends = np.cumsum([len(path) for path in paths[:-1]])
+    return np.split(nodes, ends)
+
+
+def _clip_lines_by_tiles(clip_polygon, lines, bboxes):
+    """Clip lines with polygon split into tiles.
+
+    A line that lies strictly inside of a tile is clipped by the part of the polygon inside that
+    tile, which has fewer edges than the whole polygon. Lines crossing borders of the tiles are
+    clipped by the whole polygon.
+    """
+    # pylint: disable=import-outside-toplevel
+    import pyclipper
+
+    xmin, ymin, xmax, ymax = clip_polygon.bbox
+    tile_width = (xmax - xmin) / TILES_PER_SIDE
+    tile_height = (ymax - ymin) / TILES_PER_SIDE
+
+    tiles = defaultdict(list)
+    spanning = []
+    for line, (line_xmin, line_ymin, line_xmax, line_ymax) in zip(lines, bboxes):
+        i = int((line_xmin - xmin) // tile_width)
+        j = int((line_ymin - ymin) // tile_height)
+        left, bottom = xmin + i * tile_width, ymin + j * tile_height
+        if (
+            0 <= i < TILES_PER_SIDE
+            and 0 <= j < TILES_PER_SIDE
+            and left < line_xmin
+            and line_xmax < left + tile_width
+            and bottom < line_ymin
+            and line_ymax < bottom + tile_height
+        ):
+            tiles[i, j].append(line)
+        else:
+            spanning.append(line)
+
+    clipped = []
+    for (i, j), tile_lines in tiles.items():
+        left, bottom = xmin + i * tile_width, ymin + j * tile_height
+        right, top = left + tile_width, bottom + tile_height
+        tile = ((left, bottom), (left, top), (right, top), (right, bottom))
+
+        clipper = pyclipper.Pyclipper()
+        clipper.AddPath(clip_polygon.scaled, pyclipper.PT_CLIP, True)
+        clipper.AddPath(pyclipper.scale_to_clipper(tile), pyclipper.PT_SUBJECT, True)
+        tile_polygons = clipper.Execute(pyclipper.CT_INTERSECTION)
+        if tile_polygons:
+            clipped += _clip_lines_with_pyclipper(tile_polygons, tile_lines)
+
+    if spanning:
+        clipped += _clip_lines_with_pyclipper([clip_polygon.scaled], spanning)
+    return clipped
+
+
+class ClipBatch:
+    """Queue of lines waiting to be clipped with the same polygon.
+
+    Consecutive calls of a function wrapped with `clip_lines_with_polygon` that share the
+    same owner, polygon and keyword arguments are collected and clipped by a single pyclipper
+    execution. The queue is flushed as soon as a call with other arguments arrives or anything
+    else is drawn on the canvas, so the order of drawing is preserved. Polygons are compared by
+    their coordinates, so they may be given as numpy arrays.
+    """
+
+    def __init__(self):
+        self._run = None
+        self._lines = []
+
+    def __len__(self):
+        return len(self._lines)
+
+    def add(self, func, owner, polygon, points, kwargs):
+        """Add line to the queue.
+
+        Args:
+            func: function that draws clipped line.
+            owner: object `func` is bound to.
+            polygon: clip polygon.
+            points: line to clip.
+            kwargs: keyword arguments passed to `func`.
+        """
+        run = self._run
+        if run is not None:
+            run_func, run_owner, run_polygon, run_key, run_kwargs = run
+            if not (
+                run_func is func
+                and run_owner is owner
+                and run_kwargs == kwargs
+                and (run_polygon is polygon or run_key == get_polygon_key(polygon))
+            ):
+                self.flush()
+                run = None
+        if run is None:
+            self._run = func, owner, polygon, get_polygon_key(polygon), kwargs
+        self._lines.append(points)
+
+    def flush(self):
+        """Clip all queued lines and draw them."""
+        if not self._lines:
+            return
+        func, owner, polygon, _, kwargs = self._run
+        lines = self._lines
+        self._run, self._lines = None, []
+
+        lines = clip_lines(polygon, lines)
+        if lines:
+            func(owner, polygon, lines, **kwargs)
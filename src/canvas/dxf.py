@@ -1,9 +1,9 @@
 """Module to save canvas drawings as dxf file."""
 
-from typing import Optional, Tuple, List, Union
+from functools import lru_cache
+from typing import Optional, Tuple, List, Sequence, Union
 
 import ezdxf
-from ezdxf.addons import Table
 
 from .dxf_hatch_patterns import PATTERNS
 from .backend import Backend, LineType, Color, Font, TextAligment
@@ -20,22 +20,26 @@ LINE_TYPES = {
     LineType.DASH: "DASHED3",
 }
 
-COLORS = {
-    Color.BLUE: ezdxf.rgb2int((0, 0, 255)),
-    Color.RED: ezdxf.rgb2int((255, 0, 0)),
-    Color.BLACK: ezdxf.rgb2int((0, 0, 0)),
-    Color.GRAY: ezdxf.rgb2int((125, 125, 125)),
-    Color.WHITE: ezdxf.rgb2int((255, 255, 255)),
-}
-
-COLOR_INDEXES = {
-    Color.BLUE: 5,
-    Color.RED: 1,
-    Color.BLACK: 0,
-    Color.WHITE: 255,
-    Color.GRAY: 9,
-    Color.ORANGE: 30,
-}
+# colors are looked up by their values, so both tables follow the order of `Color` members
+COLORS = (
+    ezdxf.rgb2int((0, 0, 0)),  # Color.BLACK
+    ezdxf.rgb2int((255, 255, 255)),  # Color.WHITE
+    ezdxf.rgb2int((255, 0, 0)),  # Color.RED
+    ezdxf.rgb2int((0, 0, 255)),  # Color.BLUE
+    ezdxf.rgb2int((255, 128, 0)),  # Color.ORANGE
+    ezdxf.rgb2int((125, 125, 125)),  # Color.GRAY
+    ezdxf.rgb2int((0, 255, 0)),  # Color.GREEN
+)
+
+COLOR_INDEXES = (
+    0,  # Color.BLACK
+    255,  # Color.WHITE
+    1,  # Color.RED
+    5,  # Color.BLUE
+    30,  # Color.ORANGE
+    9,  # Color.GRAY
+    3,  # Color.GREEN
+)
 
 MTEXT_ALIGMENTS = {
     TextAligment.TOP_LEFT: 1,  # 'MTEXT_TOP_LEFT',
@@ -65,24 +69,92 @@ FONTS = {
     Font.SERIAL: "OpenSans",
 }
 
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# the same fill colors are repeated for many polygons
+_rgb2int = lru_cache(maxsize=1024)(ezdxf.rgb2int)
+
+
+@lru_cache(maxsize=None)
+def _line_attribs(color, width, line_type, pattern, layer_name):
+    """Returns dxf attributes for polylines.
+
+    Returned dict is shared between calls, ezdxf copies it when creating an entity.
+    """
+    attribs = {
+        "ltscale": 1.5,
+    }
+
+    if layer_name:
+        attribs["layer"] = layer_name
+        attribs["color"] = 256
+        if pattern:
+            attribs["linetype"] = "BYLAYER"
+    else:
+        if color:
+            attribs["color"] = COLOR_INDEXES[color]
+        attribs["linetype"] = LINE_TYPES[line_type]
+        attribs["lineweight"] = width * 100
+
+    # special flag to make rendering of polyline line pattern continuous
+    # along the whole line (instead of each segment of the polyline on it's own)
+    attribs["flags"] = 128
+    return attribs
+
 
 class CanvasDxf(Backend):
     """Canvas functions to save to dxf."""
 
     # pylint: disable=too-many-instance-attributes
 
-    imagefile = None
-    width_in_mm = 500
-    height_in_mm = 420
+    __slots__ = (
+        "patterns",
+        "_resolved_patterns",
+        "image_file",
+        "doc",
+        "msp",
+        "psp",
+        "_add_lwpolyline",
+        "_add_hatch",
+        "_add_circle",
+        "_add_text",
+        "_add_mtext",
+        "width_in_mm",
+        "height_in_mm",
+    )
 
     def __init__(self, image_file, patterns=None):
 
+        self.width_in_mm = 500
+        self.height_in_mm = 420
         self.patterns = patterns or PATTERNS
+        # hatch parameters with pattern name filled in, resolved on first use by `_get_pattern`
+        self._resolved_patterns = {}
         self.image_file = image_file
         self.doc = ezdxf.new(dxfversion="R2010", setup=True)
         self.msp = self.doc.modelspace()
         self.psp = self.doc.layout("Layout1")
 
+        # methods of modelspace are bound once as they are called for every drawn element
+        self._add_lwpolyline = self.msp.add_lwpolyline
+        self._add_hatch = self.msp.add_hatch
+        self._add_circle = self.msp.add_circle
+        self._add_text = self.msp.add_text
+        self._add_mtext = self.msp.add_mtext
+
+    def _get_pattern(self, pattern_name):
+        """Returns hatch parameters of the pattern with its name filled in.
+
+        Patterns are resolved on first use, so patterns added to `patterns` later are found too.
+        """
+        try:
+            return self._resolved_patterns[pattern_name]
+        except KeyError:
+            pattern = self.patterns[pattern_name]
+            resolved = {**pattern, "name": pattern.get("name", pattern_name)}
+            self._resolved_patterns[pattern_name] = resolved
+            return resolved
+
     def create_psp(self):
         """Creates paper space."""
         width_in_mm = self.width_in_mm
@@ -208,41 +280,24 @@ class CanvasDxf(Backend):
         # pylint: disable=too-many-arguments
         # pylint: disable=too-many-locals
 
-        attribs = {
-            "ltscale": 1.5,
-        }
-
-        if layer_name:
-            attribs["layer"] = layer_name
-            attribs["color"] = 256
-            if pattern:
-                attribs["linetype"] = "BYLAYER"
-        else:
-            if color:
-                attribs["color"] = COLOR_INDEXES[color]
-            attribs["linetype"] = LINE_TYPES[line_type]
-            attribs["lineweight"] = width * 100
-
-        # special flag to make rendering of polyline line pattern continuous
-        # along the whole line (instead of each segment of the polyline on it's own)
-        attribs["flags"] = 128
+        attribs = _line_attribs(color, width, line_type, bool(pattern), layer_name)
 
         if not pattern:
-            polyline = self.msp.add_lwpolyline(
+            polyline = self._add_lwpolyline(
                 points,
                 dxfattribs=attribs,
             )
         if fill or fill_rgb:
             polyline.close(True)
             if fill_rgb:
-                color = ezdxf.rgb2int(fill_rgb)
+                color = _rgb2int(tuple(fill_rgb))
             else:
                 color = COLOR_INDEXES[fill]
             if layer_name:
                 color = 256
-            hatch = self.msp.add_hatch(color=color, dxfattribs={"true_color": color})
+            hatch = self._add_hatch(color=color, dxfattribs={"true_color": color})
             if layer_name:
-                hatch = self.msp.add_hatch(
+                hatch = self._add_hatch(
                     color=color,
                     dxfattribs={
                         "layer": layer_name,
@@ -253,16 +308,29 @@ class CanvasDxf(Backend):
                 hatch.transparency = 1 - transparency
             hatch.paths.add_polyline_path(points, is_closed=1)
         elif pattern:
-            hatch = self.msp.add_hatch()
+            hatch = self._add_hatch()
             if layer_name:
-                hatch = self.msp.add_hatch(dxfattribs={"layer": layer_name})
-            pattern_name = pattern
-            pattern_ = self.patterns[pattern_name]
-            if "name" not in pattern_:
-                pattern_["name"] = pattern_name
-            hatch.set_pattern_fill(**pattern_)
+                hatch = self._add_hatch(dxfattribs={"layer": layer_name})
+            hatch.set_pattern_fill(**self._get_pattern(pattern))
             hatch.paths.add_polyline_path(points, is_closed=1)
 
+    def draw_lines_bulk(
+        self,
+        lines: Sequence[Tuple[Tuple[float, float]]],
+        color: Color = Color.BLACK,
+        width: float = 0.3,
+        line_type: LineType = LineType.SOLID,
+        transparency: Optional[float] = None,
+        layer_name: Optional[str] = None,
+    ):
+        # pylint:disable=duplicate-code
+
+        attribs = _line_attribs(color, width, line_type, False, layer_name)
+        add_lwpolyline = self._add_lwpolyline
+        for points in lines:
+            # nodes have no widths and bulges, so they are not parsed for them
+            add_lwpolyline(points, format="xy", dxfattribs=attribs)
+
     def draw_circle(
         self,
         center: Tuple[float, float],
@@ -277,7 +345,7 @@ class CanvasDxf(Backend):
             attribs["layer"] = layer_name
             attribs["color"] = COLOR_INDEXES[color]
             attribs["linetype"] = LINE_TYPES[line_type]
-        self.msp.add_circle(center=center, radius=radius, dxfattribs=attribs)
+        self._add_circle(center=center, radius=radius, dxfattribs=attribs)
 
     def draw_text(
         self,
@@ -308,10 +376,10 @@ class CanvasDxf(Backend):
             attribs["insert"] = origin
             attribs["attachment_point"] = MTEXT_ALIGMENTS[aligment]
             attribs["width"] = wrap_width
-            self.msp.add_mtext(text, dxfattribs=attribs)
+            self._add_mtext(text, dxfattribs=attribs)
         else:
             attribs["height"] = size
-            self.msp.add_text(
+            self._add_text(
                 text,
                 dxfattribs=attribs,
             ).set_pos((origin), align=TEXT_ALIGMENTS[aligment])
@@ -319,7 +387,15 @@ class CanvasDxf(Backend):
     def save_to_file(self):
         """Save drawing to dxf file and to png file if plot_to_png set to True."""
         self.create_psp()
-        self.doc.saveas(self.image_file)
+        # same as doc.saveas(), but with a large buffer ezdxf's many small writes are coalesced
+        with open(
+            self.image_file,
+            "w",
+            encoding=self.doc.output_encoding,
+            errors="dxfreplace",
+            buffering=OUTPUT_BUFFER_SIZE,
+        ) as stream:
+            self.doc.write(stream)
 
     def draw_table(
         self,
@@ -336,6 +412,10 @@ class CanvasDxf(Backend):
         # pylint: disable=too-many-locals
         # pylint: disable=duplicate-code
 
+        # pylint: disable=import-outside-toplevel
+        # the addon is imported only when a table is drawn
+        from ezdxf.addons import Table
+
         nrows, ncols = dimensions
         table = Table(insert=origin, nrows=nrows, ncols=ncols)
         ctext = table.new_cell_style(
@@ -348,14 +428,15 @@ class CanvasDxf(Backend):
         border = table.new_border_style(color=0, priority=51)
         ctext.set_border_style(border)  # , right=False)
 
-        for i in range(len(values)):
-            table.set_row_height(i, row_height)
-        for i in range(len(values[0])):
-            table.set_col_width(i, col_width)
+        # sizes are assigned at once instead of calling set_row_height/set_col_width per cell
+        table.row_heights = [float(row_height)] * nrows
+        table.col_widths = [float(col_width)] * ncols
         if heading:
-            table.set_row_height(0, heading_height)
+            table.row_heights[0] = float(heading_height)
 
-        for i, row in enumerate(values):
+        str_values = [[str(value) for value in row] for row in values]
+        text_cell = table.text_cell
+        for i, row in enumerate(str_values):
             for j, value in enumerate(row):
-                table.text_cell(i, j, str(value), style="ctext")
+                text_cell(i, j, value, style="ctext")
         table.render(self.msp, insert=origin)
@@ -1,11 +1,14 @@
 import os
 import json
+import pickle
+from functools import lru_cache
 
 import ezdxf
 from ezdxf.math import Vec2
 
 
 JSON_DIR = os.path.join(os.path.dirname(__file__), "patterns")
+PATTERN_INDEX = "patterns.pkl"
 
 
 def serialize_pattern_definition(pattern):
@@ -21,6 +24,12 @@ def serialize_pattern_definition(pattern):
     return new_pattern
 
 
+def write_pattern(json_file, pattern):
+    """Writes pattern to json file as compact json with a single write."""
+    with open(json_file, "w", buffering=1 << 20) as f:
+        f.write(json.dumps(pattern, separators=(",", ":")))
+
+
 def dump_existing_patterns(json_dir):
     if not os.path.exists(json_dir):
         os.makedirs(json_dir)
@@ -35,8 +44,9 @@ def dump_existing_patterns(json_dir):
         to_dump["name"] = name
         json_file = os.path.join(json_dir, f"{name}.txt")
 
-        with open(json_file, "w") as f:
-            json.dump(to_dump, f, indent=4)
+        write_pattern(json_file, to_dump)
+
+    build_pattern_index(json_dir)
 
 
 def export_hatches_from_file(json_dir, dxf_file):
@@ -65,27 +75,79 @@ def export_hatches_from_file(json_dir, dxf_file):
 
             print(f'Found pattern for {attribs["pattern_name"]}. Write to {json_file}')
 
-            with open(json_file, "w") as f:
-                json.dump(to_dump, f, indent=4)
+            write_pattern(json_file, to_dump)
 
+    build_pattern_index(json_dir)
 
-def load_patterns_from_dir(path):
+
+def get_pattern_files(path):
+    """Returns sorted names of pattern files in path."""
+    return sorted(filename for filename in os.listdir(path) if filename.endswith(".txt"))
+
+
+def read_patterns_from_json(path):
     patterns = {}
 
-    for filename in os.listdir(path):
-        if filename.endswith(".txt"):
-            filename = os.path.join(path, filename)
-
-            with open(filename, "r") as f:
-                pat = json.load(f)
-            try:
-                name = pat.pop("name")
-                patterns[name] = pat
-            except KeyError:
-                pass
+    for filename in get_pattern_files(path):
+        filename = os.path.join(path, filename)
+
+        with open(filename, "r") as f:
+            pat = json.load(f)
+        try:
+            name = pat.pop("name")
+            patterns[name] = pat
+        except KeyError:
+            pass
+    return patterns
+
+
+def build_pattern_index(json_dir):
+    """Reads all pattern files in json_dir and saves them to a single pickle file.
+
+    Names of the pattern files are saved along with the patterns to find out if the index is
+    stale.
+    """
+    patterns = read_patterns_from_json(json_dir)
+    index = {"files": get_pattern_files(json_dir), "patterns": patterns}
+    with open(os.path.join(json_dir, PATTERN_INDEX), "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
     return patterns
 
 
+def _is_index_stale(path, index, index_time):
+    """Checks if pattern files were added, removed or changed after the index was built."""
+    files = get_pattern_files(path)
+    if index.get("files") != files:
+        return True
+    return any(os.path.getmtime(os.path.join(path, filename)) > index_time for filename in files)
+
+
+@lru_cache(maxsize=None)
+def _load_patterns(path):
+    index_file = os.path.join(path, PATTERN_INDEX)
+    try:
+        index_time = os.path.getmtime(index_file)
+        with open(index_file, "rb") as f:
+            index = pickle.load(f)
+    except FileNotFoundError:
+        return read_patterns_from_json(path)
+
+    if _is_index_stale(path, index, index_time):
+        return read_patterns_from_json(path)
+    return index["patterns"]
+
+
+def load_patterns_from_dir(path):
+    """Loads patterns from the pickled index in path or from pattern files if there is no index.
+
+    Pattern files are read instead of the index as well if they are newer than the index or if
+    the index lists other files.
+
+    Patterns are read once per directory, each call returns its own copies of them.
+    """
+    return {name: dict(pattern) for name, pattern in _load_patterns(path).items()}
+
+
 if __name__ == "__main__":
     # filename = 'placer/canvas/patterns/PATTERN_ENGINEER_GEOLOGY.dxf'
     #
@@ -1,9 +1,11 @@
 class CanvasException(Exception):
     """Basic exception for errors raised by Canvas."""
 
+    __slots__ = ()
+
     def __init__(self, msg):
         super(CanvasException, self).__init__(msg)
 
 class CanvasError(CanvasException):
-    pass
+    __slots__ = ()
 
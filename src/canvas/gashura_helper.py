@@ -1,35 +1,152 @@
 import math
-from .canvas_units import CanvasUnitLinked
-from .shapes import Il, Glina, Galechnik, Valunnik, Gravyi, Sand, Dresva, Sheben, Spai, Andesit, Basalt, Andesibasalt, AndesibasaltTuff, Riolite, Granodiorite, Andesidacit, Dacit, Diorite, Granite
-from .shapes import create_shape_for_rock_and_aggregate
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from enum import IntEnum
+from functools import lru_cache
+
+import numpy as np
+
+from .canvas_units import CanvasUnitLinked, transform_lines
 from .canvas import LineType
+from .clipping import clip_lines
+
+
+class Rock(IntEnum):
+    """Rocks that are drawn with shapes."""
 
+    GALECHNIK = 0
+    VALUNNIK = 1
+    GRAVYI = 2
+    IL = 3
+    SAND = 4
+    GLINA = 5
+    DRESVA = 6
+    SHEBEN = 7
+    SPAI = 8
+    ANDESIT = 9
+    DACIT = 10
+    BASALT = 11
+    ANDESIBASALT = 12
+    ANDESIDACIT = 13
+    ANDESIBASALT_TUFF = 14
+    RIOLITE = 15
+    GRANODIORITE = 16
+    DIORITE = 17
+    GRANITE = 18
 
-rock_shapes = {
-    "галечник": Galechnik(),
-    "валунник": Valunnik(),
-    "гравий": Gravyi(),
-    "ил": Il(),
-    "песок": Sand(),
-    "глина": Glina(),
-    "дресва": Dresva(),
-    "щебень": Sheben(),
-    "спай": Spai(),
-    "андезит": Andesit(),
-    "дацит": Dacit(),
-    "базальт": Basalt(),
-    "андезибазальт": Andesibasalt(),
-    "андезидацит": Andesidacit(),
-    "андезибазальт туф": AndesibasaltTuff(),
-    "риолит": Riolite(),
-    "гранодиорит": Granodiorite(),
-    "диорит": Diorite(),
-    "гранит": Granite(),
+
+ROCK_FROM_NAME = {
+    "галечник": Rock.GALECHNIK,
+    "валунник": Rock.VALUNNIK,
+    "гравий": Rock.GRAVYI,
+    "ил": Rock.IL,
+    "песок": Rock.SAND,
+    "глина": Rock.GLINA,
+    "дресва": Rock.DRESVA,
+    "щебень": Rock.SHEBEN,
+    "спай": Rock.SPAI,
+    "андезит": Rock.ANDESIT,
+    "дацит": Rock.DACIT,
+    "базальт": Rock.BASALT,
+    "андезибазальт": Rock.ANDESIBASALT,
+    "андезидацит": Rock.ANDESIDACIT,
+    "андезибазальт туф": Rock.ANDESIBASALT_TUFF,
+    "риолит": Rock.RIOLITE,
+    "гранодиорит": Rock.GRANODIORITE,
+    "диорит": Rock.DIORITE,
+    "гранит": Rock.GRANITE,
 }
 
 
-def fill_polygon_with_pattern(canvas_unit, rock, polygon, bounding_box, dip_function, aggregate=None, color=None, scale=1, offset_factor=1):
-    """Draw hatches with new style."""
+@lru_cache(maxsize=None)
+def _get_rock_shapes():
+    """Returns tuple of shapes indexed by `Rock`, shapes are imported and created on first use."""
+    # pylint: disable=import-outside-toplevel
+    from .shapes import (
+        Galechnik,
+        Valunnik,
+        Gravyi,
+        Il,
+        Sand,
+        Glina,
+        Dresva,
+        Sheben,
+        Spai,
+        Andesit,
+        Dacit,
+        Basalt,
+        Andesibasalt,
+        Andesidacit,
+        AndesibasaltTuff,
+        Riolite,
+        Granodiorite,
+        Diorite,
+        Granite,
+    )
+
+    # in order of Rock values
+    return (
+        Galechnik(),
+        Valunnik(),
+        Gravyi(),
+        Il(),
+        Sand(),
+        Glina(),
+        Dresva(),
+        Sheben(),
+        Spai(),
+        Andesit(),
+        Dacit(),
+        Basalt(),
+        Andesibasalt(),
+        Andesidacit(),
+        AndesibasaltTuff(),
+        Riolite(),
+        Granodiorite(),
+        Diorite(),
+        Granite(),
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_rock_shapes_by_name():
+    """Returns dict of shapes by names of rocks.
+
+    The dict is created once, so shapes registered in `rock_shapes` are kept.
+    """
+    shapes = _get_rock_shapes()
+    return {rock_name: shapes[rock] for rock_name, rock in ROCK_FROM_NAME.items()}
+
+
+def get_rock_shape(rock):
+    """Returns shape for rock given as `Rock` or by its name, or None if there is no such rock.
+
+    Names are looked up in `rock_shapes`, so shapes registered there are used too.
+    """
+    if isinstance(rock, Rock):
+        return _get_rock_shapes()[rock]
+    return _get_rock_shapes_by_name().get(rock)
+
+
+def __getattr__(name):
+    # rock_shapes is kept as module attribute, but it is created only when accessed
+    if name == "rock_shapes":
+        return _get_rock_shapes_by_name()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _snap_to_grid(value, step):
+    """Returns the nearest grid node below value for grid with given step."""
+    return math.floor(value / step) * step
+
+
+def fill_polygon_with_pattern(canvas_unit, rock, polygon, bounding_box, dip_function, aggregate=None, color=None, scale=1, offset_factor=1, dip_function_vec=None):
+    """Draw hatches with new style.
+
+    rock and aggregate are given by their names or as `Rock`. dip_function returns dip for a
+    single point. If dip_function_vec is given, it is used instead to get dips for (N, 2) array
+    of points at once.
+    """
     if rock == "торф":
         fill_polygon_with_lines_vertical(canvas_unit, polygon=polygon, bounding_box=bounding_box)
     elif rock == "прс":
@@ -43,16 +160,18 @@ def fill_polygon_with_pattern(canvas_unit, rock, polygon, bounding_box, dip_func
             canvas_unit, polygon=polygon, bounding_box=bounding_box, alter_linetype=False, d_mm=2
         )
     else:
-        if rock in rock_shapes:
-            shape = rock_shapes[rock]
-        else:
+        shape = get_rock_shape(rock)
+        if shape is None:
             print(f"Can't find shape for {rock}")
             return
-        shape = rock_shapes[rock]
         if aggregate:
-            if aggregate not in rock_shapes:
+            aggregate_shape = get_rock_shape(aggregate)
+            if aggregate_shape is None:
+                print(f"Can't find shape for {aggregate}")
                 return
-            aggregate_shape = rock_shapes[aggregate]
+            # pylint: disable=import-outside-toplevel
+            from .shapes import create_shape_for_rock_and_aggregate
+
             shape = create_shape_for_rock_and_aggregate(shape, aggregate_shape)
 
         fill_polygon_with_shapes(
@@ -60,6 +179,7 @@ def fill_polygon_with_pattern(canvas_unit, rock, polygon, bounding_box, dip_func
             polygon=polygon,
             bounding_box=bounding_box,
             dip_function=dip_function,
+            dip_function_vec=dip_function_vec,
             shape=shape,
             color=color,
             scale=scale,
@@ -73,17 +193,19 @@ def fill_polygon_with_lines_vertical(canvas_unit, polygon, bounding_box, dx_mm=2
 
     if isinstance(canvas_unit, CanvasUnitLinked):
         dx_m = canvas_unit.mm_to_m_horizontal(dx_mm)
+        draw_lines = canvas_unit.draw_lines_m_inside_polygon_bulk
     else:
         dx_m = dx_mm
+        draw_lines = canvas_unit.draw_lines_inside_polygon_bulk
+
+    x = _snap_to_grid(x0, dx_m)
+    xs = np.arange(x + dx_m, x1 + dx_m, dx_m)
 
-    x = x0 - x0 % dx_m
-    while x < x1:
-        x += dx_m
-        line = ((x, y0), (x, y1))
-        if isinstance(canvas_unit, CanvasUnitLinked):
-            canvas_unit.draw_lines_m_inside_polygon(polygon=polygon, points=line, width=0.1)
-        else:
-            canvas_unit.draw_lines_inside_polygon(polygon=polygon, points=line, width=0.1)
+    lines = np.empty((len(xs), 2, 2))
+    lines[:, :, 0] = xs[:, np.newaxis]
+    lines[:, 0, 1] = y0
+    lines[:, 1, 1] = y1
+    draw_lines(polygon=polygon, lines=lines.tolist(), width=0.1)
 
 
 def fill_polygon_with_lines_diagonal(
@@ -100,50 +222,87 @@ def fill_polygon_with_lines_diagonal(
     if isinstance(canvas_unit, CanvasUnitLinked):
         dy_m = canvas_unit.mm_to_m_vertical(dy_mm)
         dx_m = canvas_unit.mm_to_m_horizontal(dx_mm)
+        draw_lines = canvas_unit.draw_lines_m_inside_polygon_bulk
+        draw_clipped_lines = canvas_unit.draw_lines_m_bulk
     else:
         dy_m = dy_mm
         dx_m = dx_mm
         dy = dx
+        draw_lines = canvas_unit.draw_lines_inside_polygon_bulk
+        draw_clipped_lines = canvas_unit.draw_lines_bulk
 
     y0_ = y0 - dy
 
-    y = y0_ - y0_ % dy_m
-    x = x0 - x0 % dx_m
-    if (x // dx_m) % 2:
-        x += dx_m
+    y = _snap_to_grid(y0_, dy_m)
+
+    # parity of the grid node is taken from its index, as x // dx_m is prone to rounding errors
+    x_index = math.floor(x0 / dx_m)
+    if x_index % 2:
+        x_index += 1
+    x = x_index * dx_m
 
-    # print (x % (2 * dx_m))
     line_type_flag = True
-    if (x // dx_m) % 4:
+    if x_index % 4:
         line_type_flag = False
-    # print((x // dx_m) % 4)
 
-    x_left, x_right = x - 50 * dx, x + 50 * dx
-    while y - 50 * dy < y1:
-        y_bottom, y_top = y - 50 * dy, y + 50 * dy
+    ys = np.arange(y, y1 + 50 * dy, dy_m)
 
-        line = ((x_left, y_bottom), (x_right, y_top))
-        y += dy_m
-        # print(f"{y=}, {dy_m=} {y%(2*dy_m)=}")
+    lines = np.empty((len(ys), 2, 2))
+    lines[:, 0, 0] = x - 50 * dx
+    lines[:, 1, 0] = x + 50 * dx
+    lines[:, 0, 1] = ys - 50 * dy
+    lines[:, 1, 1] = ys + 50 * dy
+    lines = lines.tolist()
 
-        if alter_linetype:
-            line_type_flag = not line_type_flag
-            line_type = LineType.DASH if line_type_flag else LineType.SOLID
-        else:
-            line_type = linetype or LineType.SOLID
+    if alter_linetype:
+        # line type alternates from line to line and the flag is flipped before the first line
+        line_types = (LineType.SOLID, LineType.DASH)
+        if not line_type_flag:
+            line_types = line_types[::-1]
 
-        if isinstance(canvas_unit, CanvasUnitLinked):
-            canvas_unit.draw_lines_m_inside_polygon(
-                polygon=polygon, points=line, width=0.1, line_type=line_type, color=color
-            )
-        else:
-            canvas_unit.draw_lines_inside_polygon(
-                polygon=polygon, points=line, width=0.1, line_type=line_type, color=color
+        # lines of each line type are clipped at once, but clipped parts are drawn line by line,
+        # so solid and dashed lines interleave in the output as when they were drawn one by one
+        parts_by_line = defaultdict(list)
+        for parity, line_type in enumerate(line_types):
+            for part in clip_lines(polygon, lines[parity::2]):
+                # all lines go in the direction (dx, dy), the line of the part is found by the
+                # offset of its first node from the first line
+                part_x, part_y = part[0]
+                index = round(((part_y - ys[0]) * dx - (part_x - x) * dy) / (dy_m * dx))
+                parts_by_line[index].append(part)
+
+        for index in sorted(parts_by_line):
+            draw_clipped_lines(
+                parts_by_line[index], width=0.1, line_type=line_types[index % 2], color=color
             )
+    else:
+        line_type = linetype or LineType.SOLID
+        draw_lines(polygon=polygon, lines=lines, width=0.1, line_type=line_type, color=color)
 
 
-def fill_polygon_with_shapes(canvas_unit, polygon, bounding_box, dip_function, shape, color=None, scale=1, offset_factor=1):
-    """Draws shape withing layer polygon."""
+def _generate_lattice(x0, x1, y0, y1, dx_m, dy_m):
+    """Returns (N, 2) array of points where shapes are placed.
+
+    Points are ordered row by row from the bottom, every second row is shifted by half of dx_m.
+    """
+    # pylint: disable=too-many-arguments
+    ys = np.arange(y0, y1 + dy_m, dy_m)
+    rows_xs = (np.arange(x0, x1 + dx_m, dx_m), np.arange(x0 + 0.5 * dx_m, x1 + dx_m, dx_m))
+
+    rows = []
+    for row, y in enumerate(ys):
+        xs = rows_xs[row % 2]
+        points = np.empty((len(xs), 2))
+        points[:, 0] = xs
+        points[:, 1] = y
+        rows.append(points)
+    if not rows:
+        return np.empty((0, 2))
+    return np.concatenate(rows)
+
+
+def _get_shape_grid(canvas_unit, bounding_box, shape, scale=1, offset_factor=1):
+    """Returns snapped bounding box and steps of the grid where shapes are placed."""
     x0, x1, y0, y1 = bounding_box
     if isinstance(canvas_unit, CanvasUnitLinked):
         dx_m = canvas_unit.mm_to_m_horizontal(shape.dx_mm)
@@ -155,25 +314,100 @@ def fill_polygon_with_shapes(canvas_unit, polygon, bounding_box, dip_function, s
     dx_m *= scale * offset_factor
     dy_m *= scale * offset_factor
 
-    y0 = y0 - y0 % (2 * dy_m)
-    x0 = x0 - x0 % dx_m
+    y0 = _snap_to_grid(y0, 2 * dy_m)
+    x0 = _snap_to_grid(x0, dx_m)
+    return (x0, x1, y0, y1), dx_m, dy_m
 
-    y = y0
-    shift_x = False
-    while y < y1 + dy_m:
 
-        x = x0
-        if shift_x:
-            x += 0.5 * dx_m
-        shift_x = not shift_x
+def _compute_shape_placement(grid, dip_function, dip_function_vec=None):
+    """Returns positions of shapes on the grid and their angles.
 
-        while x < x1 + dx_m:
-            dip = dip_function((x, y)) or 0
-            angle = math.degrees(math.atan(dip * 10))
-            shape.draw((x, y), angle, canvas_unit, polygon, color, scale=scale)
-            x += dx_m
+    Needs no canvas, so it could be run in another process.
+    """
+    (x0, x1, y0, y1), dx_m, dy_m = grid
+    lattice = _generate_lattice(x0, x1, y0, y1, dx_m, dy_m)
+    if dip_function_vec is not None:
+        dips = np.asarray(dip_function_vec(lattice), dtype=np.float64)
+    else:
+        dips = np.array([dip_function((x, y)) or 0 for x, y in lattice.tolist()], dtype=np.float64)
+    return lattice, np.degrees(np.arctan(dips * 10))
 
-        y += dy_m
+
+def _draw_shapes(canvas_unit, polygon, shape, lattice, angles, color=None, scale=1):
+    """Draws shapes at positions of the lattice rotated by given angles."""
+    # pylint: disable=too-many-arguments
+    if isinstance(canvas_unit, CanvasUnitLinked):
+        # shapes are drawn in mm of the unit, so the polygon and positions are scaled once
+        polygon = tuple(canvas_unit.scale_points(polygon))
+        positions = transform_lines(
+            [lattice],
+            offset=(canvas_unit.x_offset_m, canvas_unit.y_offset_m),
+            scale=(canvas_unit.scale_horizontal_mm, canvas_unit.scale_vertical_mm),
+        )[0]
+    else:
+        positions = lattice.tolist()
+
+    # shapes picked at random are seeded by positions before scaling
+    shape.draw_many(
+        positions,
+        angles.tolist(),
+        canvas_unit,
+        polygon=polygon,
+        color=color,
+        scale=scale,
+        seed_positions=lattice.tolist(),
+    )
+
+
+def fill_polygon_with_shapes(canvas_unit, polygon, bounding_box, dip_function, shape, color=None, scale=1, offset_factor=1, dip_function_vec=None):
+    """Draws shape withing layer polygon."""
+    grid = _get_shape_grid(canvas_unit, bounding_box, shape, scale=scale, offset_factor=offset_factor)
+    lattice, angles = _compute_shape_placement(grid, dip_function, dip_function_vec)
+    _draw_shapes(canvas_unit, polygon, shape, lattice, angles, color=color, scale=scale)
+
+
+def fill_many_polygons_with_shapes(canvas_unit, jobs, max_workers=None):
+    """Draws shapes within several polygons.
+
+    Positions and angles of shapes are computed for all polygons in parallel processes, then the
+    shapes are drawn one polygon after another in the order of jobs.
+
+    Args:
+        canvas_unit: unit that draws the shapes.
+        jobs: list of dicts with keyword arguments of `fill_polygon_with_shapes`. Dip functions
+            are sent to other processes, so they have to be picklable, i.e. module level functions.
+        max_workers: number of processes, by default number of processors.
+    """
+    grids = [
+        _get_shape_grid(
+            canvas_unit,
+            job["bounding_box"],
+            job["shape"],
+            scale=job.get("scale", 1),
+            offset_factor=job.get("offset_factor", 1),
+        )
+        for job in jobs
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        placements = list(
+            executor.map(
+                _compute_shape_placement,
+                grids,
+                [job["dip_function"] for job in jobs],
+                [job.get("dip_function_vec") for job in jobs],
+            )
+        )
+
+    for job, (lattice, angles) in zip(jobs, placements):
+        _draw_shapes(
+            canvas_unit,
+            job["polygon"],
+            job["shape"],
+            lattice,
+            angles,
+            color=job.get("color"),
+            scale=job.get("scale", 1),
+        )
 
 
 def fill_polygon_with_curved_lines(self, layer):
@@ -181,8 +415,8 @@ def fill_polygon_with_curved_lines(self, layer):
     x0, _, y0, y1 = layer.bounding_box
     dx_m = self.mm_to_m_horizontal(3)
     dy_m = self.mm_to_m_vertical(3)
-    y0 = y0 - y0 % (2 * dy_m)
-    x0 = x0 - x0 % dx_m
+    y0 = _snap_to_grid(y0, 2 * dy_m)
+    x0 = _snap_to_grid(x0, dx_m)
 
     points = list(layer.bottom)
     y = y0
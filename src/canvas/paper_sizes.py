@@ -2,18 +2,26 @@
 Page sizes
 """
 
+from types import MappingProxyType
+
 SIZE_A3 = (420,297)
 SIZE_A2 = (594, 420)
 SIZE_A1 = (841, 594)
 SIZE_A0 = (1189, 841)
 
-SIZES = {
+# rotated sizes
+SIZE_A3_R = (297, 420)
+SIZE_A2_R = (420, 594)
+SIZE_A1_R = (594, 841)
+SIZE_A0_R = (841, 1189)
+
+SIZES = MappingProxyType({
     "A3": SIZE_A3,
     "A2": SIZE_A2,
     "A1": SIZE_A1,
     "A0": SIZE_A0,
-    "A3_": (SIZE_A3[1], SIZE_A3[0]),
-    "A2_": (SIZE_A2[1], SIZE_A2[0]),
-    "A1_": (SIZE_A1[1], SIZE_A1[0]),
-    "A0_": (SIZE_A0[1], SIZE_A0[0]),
-}
+    "A3_": SIZE_A3_R,
+    "A2_": SIZE_A2_R,
+    "A1_": SIZE_A1_R,
+    "A0_": SIZE_A0_R,
+})
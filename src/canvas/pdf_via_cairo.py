@@ -1,26 +1,58 @@
 """Module for CanvasCairo."""
-from typing import Tuple, Optional, List, Union
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Tuple, Optional, List, Sequence, Union
 from math import pi, radians
 
 import cairo
+import numpy as np
 
 from .backend import Backend, LineType, Color, Font, TextAligment
 from .logger import logger
 
-COLORS = {
-    Color.BLUE: (0, 0, 1),
-    Color.RED: (1, 0, 0),
-    Color.BLACK: (0, 0, 0),
-    Color.GRAY: (0.7, 0.7, 0.7),
-    Color.WHITE: (1, 1, 1),
-    Color.ORANGE: (1, 0.5, 0),
-    Color.GREEN: (0, 1, 0),
-}
+# colors are looked up by their values, so the table follows the order of `Color` members
+COLORS = (
+    (0, 0, 0),  # Color.BLACK
+    (1, 1, 1),  # Color.WHITE
+    (1, 0, 0),  # Color.RED
+    (0, 0, 1),  # Color.BLUE
+    (1, 0.5, 0),  # Color.ORANGE
+    (0.7, 0.7, 0.7),  # Color.GRAY
+    (0, 1, 0),  # Color.GREEN
+)
 
 FONTS = {
     Font.SERIAL: "OpenSans",
 }
 
+# offsets of the text origin in widths and heights of the text for each aligment
+ALIGMENT_OFFSETS = {
+    TextAligment.TOP_LEFT: (0, 1),
+    TextAligment.TOP_CENTER: (-0.5, 1),
+    TextAligment.TOP_RIGHT: (-1, 1),
+    TextAligment.LEFT: (0, 0),
+    TextAligment.CENTER: (-0.5, 0),
+    TextAligment.RIGHT: (-1, 0),
+    TextAligment.BOTTOM_LEFT: (0, 0.5),
+    TextAligment.BOTTOM_CENTER: (-0.5, 0.5),
+    TextAligment.BOTTOM_RIGHT: (-1, 0.5),
+}
+
+
+# lengths of dashes in widths of the line
+DASH_FACTORS = {
+    LineType.DOT: 4,
+    LineType.THAWED: 5,
+    LineType.DASH: 6,
+}
+
+
+@lru_cache(maxsize=64)
+def get_dash(line_type, width):
+    """Returns dash pattern of the line type for given width of the line."""
+    factor = DASH_FACTORS.get(line_type)
+    return (width * factor,) if factor else ()
+
 
 def transform_rgb(red, green, blue):
     """Scale down rgb colors from 0-255 to 0-1."""
@@ -28,6 +60,31 @@ def transform_rgb(red, green, blue):
     return red / 255, green / 255, blue / 255
 
 
+TEXT_EXTENTS_CACHE_SIZE = 2048
+
+
+def text_extents(context, text, cache=None, cache_key=None):
+    """Returns text extents of text measured by cairo context.
+
+    Extents are stored in cache by cache_key and text, as the same strings (digits, headers of
+    tables) are measured many times. cache_key has to identify font face, font size and rotation
+    the text is measured with. Without cache text is measured every time.
+    """
+    if cache is None or cache_key is None:
+        return context.text_extents(text)
+
+    key = cache_key, text
+    try:
+        extents = cache[key]
+    except KeyError:
+        extents = cache[key] = tuple(context.text_extents(text))
+        if len(cache) > TEXT_EXTENTS_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return extents
+
+
 def wrap_text(func):
     def wrapper(
         self,
@@ -38,14 +95,21 @@ def wrap_text(func):
         font: Font = Font.SERIAL,
         **kwargs,
     ):
-        self.ctx.select_font_face(FONTS[font])
-        self.ctx.set_font_size(size * 1.5)
+        font_face, font_size = FONTS[font], size * 1.5
+        if self.font_key != (font_face, font_size):
+            self.ctx.select_font_face(font_face)
+            self.ctx.set_font_size(font_size)
+            self.font_key = font_face, font_size
 
         x, y = origin
 
-        for line in iterate_over_new_line_string(text):
+        for line in text.splitlines() or [""]:
             for segment, height in iterate_over_segments_width(
-                text=line, wrap_width=wrap_width, context=self.ctx
+                text=line,
+                wrap_width=wrap_width,
+                context=self.ctx,
+                cache=self._text_extents_cache,
+                cache_key=(*self.font_key, 0),
             ):
                 func(self, origin=(x, y), text=segment, **kwargs)
                 y -= height
@@ -53,27 +117,26 @@ def wrap_text(func):
     return wrapper
 
 
-def iterate_over_segments_width(text, wrap_width, context):
+def iterate_over_segments_width(text, wrap_width, context, cache=None, cache_key=None):
     if not wrap_width:
-        (_, _, _, height, _, _) = context.text_extents(text)
+        (_, _, _, height, _, _) = text_extents(context, text, cache, cache_key)
         yield text, height
         return
-    words = text.split(" ")
-    sentence = ""
-    while words:
-        word = words.pop(0)
-        (_, _, width, height, _, _) = context.text_extents(str(sentence + " " + word))
-        if width < wrap_width:
-            sentence = sentence + " " + word
-            continue
-        yield sentence, height
-        sentence = word
-    yield sentence, height
 
-
-def iterate_over_new_line_string(text):
-    for line in text.split("\n"):
-        yield line
+    # every word is measured once and widths of words and spaces are summed up
+    (_, _, _, _, space_width, _) = text_extents(context, " ", cache, cache_key)
+    words, words_width, words_height = [], 0, 0
+    for word in text.split(" "):
+        (_, _, _, height, width, _) = text_extents(context, word, cache, cache_key)
+        if words and words_width + space_width + width >= wrap_width:
+            yield " ".join(words), max(words_height, height)
+            words, words_width, words_height = [], 0, 0
+        if words:
+            words_width += space_width
+        words.append(word)
+        words_width += width
+        words_height = max(words_height, height)
+    yield " ".join(words), words_height
 
 
 class CanvasCairo(Backend):
@@ -87,6 +150,9 @@ class CanvasCairo(Backend):
             image_file += ".pdf"
         self.imagefile = image_file
         self.width_in_mm, self.height_in_mm = width_in_mm, height_in_mm
+        # font face and size selected in the context, used to cache text extents
+        self.font_key = None
+        self._text_extents_cache = OrderedDict()
 
     def get_surface(self):
         return cairo.PDFSurface(self.imagefile, self.width, self.height)
@@ -103,6 +169,15 @@ class CanvasCairo(Backend):
         self.ctx = cairo.Context(self.surface)
         self._transform_to_mm()
 
+        # state of the context applied last, setters are skipped when it does not change
+        self.font_key = None
+        # extents depend on the surface, so they are measured again for every drawing
+        self._text_extents_cache = OrderedDict()
+        self._last_source = None
+        self._last_width = None
+        self._last_dash = None
+        self._last_cap = None
+
         # self.load_patterns()
 
     def _transform_to_mm(self):
@@ -119,6 +194,51 @@ class CanvasCairo(Backend):
         y = self.height_in_mm - y
         return x, y
 
+    def _set_source_rgb(self, red, green, blue, alpha=None):
+        source = red, green, blue, alpha
+        if source != self._last_source:
+            if alpha is None:
+                self.ctx.set_source_rgb(red, green, blue)
+            else:
+                self.ctx.set_source_rgba(red, green, blue, alpha)
+            self._last_source = source
+
+    def _set_line_width(self, width):
+        if width != self._last_width:
+            self.ctx.set_line_width(width)
+            self._last_width = width
+
+    def _set_line_style(self, line_type, width):
+        dash = get_dash(line_type, width)
+        if dash != self._last_dash:
+            self.ctx.set_dash(dash)
+            self._last_dash = dash
+        cap = cairo.LINE_CAP_ROUND  # pylint: disable=no-member
+        if cap != self._last_cap:
+            self.ctx.set_line_cap(cap)
+            self._last_cap = cap
+
+    def _append_line(self, points):
+        # same as _transform_coordinates, inlined as it is called for every node
+        height_in_mm = self.height_in_mm
+        line_to = self.ctx.line_to
+
+        if isinstance(points, np.ndarray):
+            # lines clipped by polygons are arrays, iterating over their rows is slow, so y is
+            # flipped for all nodes at once and nodes are converted to floats in one call
+            nodes = np.array(points, dtype=np.float64)
+            nodes[:, 1] = height_in_mm - nodes[:, 1]
+            nodes = nodes.tolist()
+            self.ctx.move_to(*nodes[0])
+            for x, y in nodes[1:]:
+                line_to(x, y)
+            return
+
+        x, y = points[0]
+        self.ctx.move_to(x, height_in_mm - y)
+        for x, y in points[1:]:
+            line_to(x, height_in_mm - y)
+
     def draw_rectangle(
         self,
         origin: Tuple[float, float],
@@ -134,15 +254,17 @@ class CanvasCairo(Backend):
 
         # cairo_color = COLORS[fill_color] if fill_color else transform_rgb(*fill_rgb)
         cairo_color = transform_rgb(*fill_rgb) if fill_rgb else COLORS[fill_color]
-        self.ctx.set_source_rgb(*cairo_color)
+        self._set_source_rgb(*cairo_color)
 
         self.ctx.rectangle(x0, y0, size[0], -1 * size[1])
-        self.ctx.fill_preserve()
 
         if edge_color:
-            self.ctx.set_line_width(width)
-            self.ctx.set_source_rgb(*COLORS[edge_color])
-        self.ctx.stroke()
+            self.ctx.fill_preserve()
+            self._set_line_width(width)
+            self._set_source_rgb(*COLORS[edge_color])
+            self.ctx.stroke()
+        else:
+            self.ctx.fill()
 
     def draw_lines(
         self,
@@ -156,22 +278,12 @@ class CanvasCairo(Backend):
         pattern=None,
         layer_name: Optional[str] = None,
     ):
-        if line_type == LineType.DOT:
-            self.ctx.set_dash([width * 4])
-        elif line_type == LineType.THAWED:
-            self.ctx.set_dash([width * 5])
-        elif line_type == LineType.DASH:
-            self.ctx.set_dash([width * 6])
-        else:
-            self.ctx.set_dash([])
-        self.ctx.set_line_cap(cairo.LINE_CAP_ROUND)  # pylint: disable=no-member
-
-        point0 = self._transform_coordinates(*points[0])
-        self.ctx.move_to(*point0)
+        # lines without color and fill are stroked with the default color as dxf backend draws
+        # them, so their path is never left in the context for the next one
+        if not (color or fill or fill_rgb or pattern):
+            color = Color.BLACK
 
-        for point in points[1:]:
-            point = self._transform_coordinates(*point)
-            self.ctx.line_to(*point)
+        self._append_line(points)
 
         if pattern:
             fill = Color.GRAY
@@ -181,16 +293,39 @@ class CanvasCairo(Backend):
             cairo_color = COLORS[fill] if fill else transform_rgb(*fill_rgb)
 
             if transparency:
-                self.ctx.set_source_rgba(*cairo_color, transparency)
+                self._set_source_rgb(*cairo_color, transparency)
             else:
-                self.ctx.set_source_rgb(*cairo_color)
+                self._set_source_rgb(*cairo_color)
             self.ctx.fill()
 
         if color:
-            self.ctx.set_source_rgb(*COLORS[color])
-            self.ctx.set_line_width(width)
+            # dash and cap affect only stroking
+            self._set_line_style(line_type, width)
+            self._set_source_rgb(*COLORS[color])
+            self._set_line_width(width)
             self.ctx.stroke()
 
+    def draw_lines_bulk(
+        self,
+        lines: Sequence[Tuple[Tuple[float, float]]],
+        color: Color = Color.BLACK,
+        width: float = 0.3,
+        line_type: LineType = LineType.SOLID,
+        transparency: Optional[float] = None,
+        layer_name: Optional[str] = None,
+    ):
+        # lines without color are stroked with the default one as dxf backend draws them
+        if not color:
+            color = Color.BLACK
+
+        self._set_line_style(line_type, width)
+        for points in lines:
+            self._append_line(points)
+
+        self._set_source_rgb(*COLORS[color])
+        self._set_line_width(width)
+        self.ctx.stroke()
+
     @wrap_text
     def draw_text(
         self,
@@ -207,44 +342,34 @@ class CanvasCairo(Backend):
     ):
         # pylint: disable=too-many-locals
         color = COLORS[color]
-        self.ctx.set_source_rgb(*color)
+        self._set_source_rgb(*color)
 
-        # x, y = self._transform_coordinates(*origin)
+        # source is set before saving the context, so it is still the one remembered in
+        # _last_source after the context is restored
         x_original, y_original = self._transform_coordinates(*origin)
+        self.ctx.save()
         self.ctx.translate(x_original, y_original)
         self.ctx.rotate(radians(-angle))
 
         x, y = 0, 0
 
-        (_, _, width, height, _, _) = self.ctx.text_extents(str(text))
-        if aligment == TextAligment.LEFT:
-            pass
-        elif aligment in [TextAligment.CENTER, TextAligment.BOTTOM_CENTER, TextAligment.TOP_CENTER]:
-            x -= 0.5 * width
-        elif aligment in [TextAligment.RIGHT, TextAligment.BOTTOM_RIGHT, TextAligment.TOP_RIGHT]:
-            x -= width
-        if aligment in [
-            TextAligment.BOTTOM_LEFT,
-            TextAligment.BOTTOM_CENTER,
-            TextAligment.BOTTOM_RIGHT,
-        ]:
-            y += 0.5 * height
-        elif aligment in [TextAligment.TOP_LEFT, TextAligment.TOP_CENTER, TextAligment.TOP_RIGHT]:
-            y += 1.0 * height
+        # size of the text is needed only to align it or to draw its background
+        x_offset, y_offset = ALIGMENT_OFFSETS[aligment]
+        if x_offset or y_offset or white_background:
+            (_, _, width, height, _, _) = text_extents(
+                self.ctx, str(text), self._text_extents_cache, (*self.font_key, angle)
+            )
+            x, y = x_offset * width, y_offset * height
 
         if white_background:
-            x_new, y_new = self._transform_coordinates_back(x, y)
-            self.draw_rectangle((x_new, y_new), (width, height), fill_color=Color.WHITE)
-            self.ctx.set_source_rgb(*color)
+            self._set_source_rgb(*COLORS[Color.WHITE])
+            self.ctx.rectangle(x, y, width, -height)
+            self.ctx.fill()
+            self._set_source_rgb(*color)
 
-        # self.ctx.translate(x_original, y_original)
-        # self.ctx.rotate(radians(-angle))
-        # self.ctx.move_to(0, 0)
         self.ctx.move_to(x, y)
         self.ctx.show_text(text)
-
-        self.ctx.rotate(radians(angle))
-        self.ctx.translate(-x_original, -y_original)
+        self.ctx.restore()
 
     def add_layer(
         self,
@@ -267,8 +392,8 @@ class CanvasCairo(Backend):
         x, y = self._transform_coordinates(*center)
         self.ctx.move_to(x, y)
         self.ctx.arc(x, y, radius, 0, 2 * pi)
-        self.ctx.set_source_rgb(*COLORS[color])
-        self.ctx.set_line_width(0.04)
+        self._set_source_rgb(*COLORS[color])
+        self._set_line_width(0.04)
         self.ctx.stroke()
 
     # flake8: noqa: D102
@@ -285,50 +410,42 @@ class CanvasCairo(Backend):
     ):
         x0, y0 = origin
 
+        # all lines of the grid are stroked at once, text of the cells is drawn after the grid
+        grid_lines, cells = [], []
+
         if heading:
             heading_row = values.pop(0)
             y_top = y0
-            point_left = x0, y_top
-            point_right = x0 + col_width * (len(heading_row)), y_top
-            self.draw_lines((point_left, point_right), width=0.1)
+            y_bottom = y_top - row_height
+            y_bottom2 = y_top - heading_height
+            grid_lines.append(((x0, y_top), (x0 + col_width * (len(heading_row)), y_top)))
             y0 -= heading_height
             for cell_number, cell in enumerate(heading_row):
                 x_left = x0 + col_width * cell_number
-                y_bottom = y_top - row_height
-                y_bottom2 = y_top - heading_height
-                point_bottom_left = x_left, y_bottom
-                point_bottom_left2 = x_left, y_bottom2
-                point_top_left = x_left, y_top
-                self.draw_lines((point_bottom_left2, point_top_left), width=0.1)
-                self.draw_text(point_bottom_left, str(cell), size=text_height)
+                grid_lines.append(((x_left, y_bottom2), (x_left, y_top)))
+                cells.append(((x_left, y_bottom), cell))
 
             x_left = x0 + col_width * (cell_number + 1)
-            point_bottom_left2 = x_left, y_bottom2
-            point_top_left = x_left, y_top
-            self.draw_lines((point_bottom_left2, point_top_left), width=0.1)
+            grid_lines.append(((x_left, y_bottom2), (x_left, y_top)))
 
         for row_number, row in enumerate(values):
             y_top = y0 - row_height * row_number
-            point_left = x0, y_top
-            point_right = x0 + col_width * (len(row)), y_top
-            self.draw_lines((point_left, point_right), width=0.1)
+            y_bottom = y_top - row_height
+            grid_lines.append(((x0, y_top), (x0 + col_width * (len(row)), y_top)))
             for cell_number, cell in enumerate(row):
                 x_left = x0 + col_width * cell_number
-                y_bottom = y_top - row_height
-                point_bottom_left = x_left, y_bottom
-                point_top_left = x_left, y_top
-                self.draw_lines((point_bottom_left, point_top_left), width=0.1)
-                self.draw_text(point_bottom_left, str(cell), size=text_height)
+                grid_lines.append(((x_left, y_bottom), (x_left, y_top)))
+                cells.append(((x_left, y_bottom), cell))
 
             x_left = x0 + col_width * (cell_number + 1)
-            point_bottom_left = x_left, y_bottom
-            point_top_left = x_left, y_top
-            self.draw_lines((point_bottom_left, point_top_left), width=0.1)
+            grid_lines.append(((x_left, y_bottom), (x_left, y_top)))
 
         y_top = y0 - row_height * (row_number + 1)
-        point_left = x0, y_top
-        point_right = x0 + col_width * (len(row)), y_top
-        self.draw_lines((point_left, point_right), width=0.1)
+        grid_lines.append(((x0, y_top), (x0 + col_width * (len(row)), y_top)))
+
+        self.draw_lines_bulk(grid_lines, width=0.1)
+        for point_bottom_left, cell in cells:
+            self.draw_text(point_bottom_left, str(cell), size=text_height)
 
     # flake8: noqa: D102
     def save_to_file(self):
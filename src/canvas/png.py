@@ -1,31 +1,117 @@
 """Module for Canvas backend that plots png as a result."""
 
 import os
+from math import ceil, cos, radians, sin
 
 import cairo
+import numpy as np
 
 from .pdf_via_cairo import CanvasCairo
 
-watermark_cmd = """ \( -size 250x -background none -fill gray -gravity center \
-label:"talveg.ru" -trim -rotate -30 \
--bordercolor none -border 50 \
--write mpr:wm +delete \
-+clone -fill mpr:wm  -draw 'color 0,0 reset' \) \
--compose over -composite \
-"""
+WATERMARK_TEXT = "talveg.ru"
+# width of the label in pixels before rotation
+WATERMARK_WIDTH = 250
+# counterclockwise rotation of the label in degrees
+WATERMARK_ANGLE = 30
+WATERMARK_BORDER = 50
+WATERMARK_COLOR = (190 / 255, 190 / 255, 190 / 255)
+
+# colors that differ from the border color less than this fraction are trimmed
+TRIM_FUZZ = 0.01
+
+
+def render_watermark() -> cairo.ImageSurface:
+    """Renders tile of the watermark: rotated label with transparent border around it."""
+    context = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
+    context.select_font_face("sans-serif")
+    context.set_font_size(WATERMARK_WIDTH)
+    x_bearing, y_bearing, width, height, _, _ = context.text_extents(WATERMARK_TEXT)
+
+    # font size is chosen so that the label fits the width of the watermark
+    font_size = WATERMARK_WIDTH * WATERMARK_WIDTH / width
+    ratio = font_size / WATERMARK_WIDTH
+    x_bearing, y_bearing, width, height = (
+        x_bearing * ratio,
+        y_bearing * ratio,
+        width * ratio,
+        height * ratio,
+    )
+
+    angle = radians(WATERMARK_ANGLE)
+    tile_width = ceil(width * cos(angle) + height * sin(angle)) + 2 * WATERMARK_BORDER
+    tile_height = ceil(width * sin(angle) + height * cos(angle)) + 2 * WATERMARK_BORDER
+
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, tile_width, tile_height)
+    context = cairo.Context(surface)
+    context.translate(tile_width / 2, tile_height / 2)
+    context.rotate(-angle)
+    context.select_font_face("sans-serif")
+    context.set_font_size(font_size)
+    context.set_source_rgb(*WATERMARK_COLOR)
+    context.move_to(-width / 2 - x_bearing, -height / 2 - y_bearing)
+    context.show_text(WATERMARK_TEXT)
+    surface.flush()
+    return surface
+
+
+def get_trim_box(surface: cairo.ImageSurface, fuzz: float = TRIM_FUZZ):
+    """Returns box of the surface that is left after trimming its border.
+
+    The border is made of pixels that have the color of the top left pixel, as in ImageMagick's
+    `-trim`. Pixels are read from the buffer of the surface without copying it.
+
+    Returns:
+        x, y, width and height of the box.
+    """
+    surface.flush()
+    width, height = surface.get_width(), surface.get_height()
+    pixels = np.frombuffer(surface.get_data(), dtype=np.uint8)
+    pixels = pixels.reshape(height, surface.get_stride() // 4, 4)[:, :width]
+
+    corner = pixels[0, 0].astype(np.int16)
+    content = (np.abs(pixels - corner) > fuzz * 255).any(axis=2)
+    rows = np.flatnonzero(content.any(axis=1))
+    if not rows.size:
+        return 0, 0, width, height
+    cols = np.flatnonzero(content.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
 
 
 class CanvasPng(CanvasCairo):
+    # the label of the watermark never changes, so it is rendered once for all images
+    _watermark = None
+
+    @classmethod
+    def get_watermark(cls) -> cairo.ImageSurface:
+        """Returns tile of the watermark rendered on first use."""
+        if cls._watermark is None:
+            cls._watermark = render_watermark()
+        return cls._watermark
+
     def get_surface(self):
         return cairo.ImageSurface(cairo.FORMAT_ARGB32, int(self.width), int(self.height))
 
     def save_to_file(self):
-        self.surface.write_to_png(self.imagefile)
-        super().save_to_file()
+        """Flattens drawing on white background, trims it, covers with watermark and saves."""
+        context = cairo.Context(self.surface)
+        context.set_operator(cairo.OPERATOR_DEST_OVER)
+        context.set_source_rgb(1, 1, 1)
+        context.paint()
+
+        x, y, width, height = get_trim_box(self.surface)
+        image = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        context = cairo.Context(image)
+        context.set_source_surface(self.surface, -x, -y)
+        context.paint()
 
-        pdf_file = self.imagefile
-        png_file = f"{pdf_file[:-3]}png"
-        output_file = f"{pdf_file[:-4]}"
+        watermark = cairo.SurfacePattern(self.get_watermark())
+        watermark.set_extend(cairo.EXTEND_REPEAT)
+        context.set_source(watermark)
+        context.paint()
 
-        os.system(f"convert {pdf_file} -flatten -fuzz 1% -trim +repage {watermark_cmd} {png_file}")
-        os.system(f"mv {png_file} {output_file}")
+        # png is written next to the output file and renamed, so the output is never partial
+        output_file = self.imagefile[:-4]
+        temp_file = f"{output_file}.tmp"
+        image.write_to_png(temp_file)
+        os.replace(temp_file, output_file)
+        self.surface.finish()
@@ -4,12 +4,23 @@ import random
 from abc import ABC
 from typing import Tuple, Generator, Iterable
 import math
-from itertools import cycle
+from functools import lru_cache
 
 from .canvas_units import CanvasUnitLinked
 
 from .backend import Color
 
+
+@lru_cache(maxsize=256)
+def _sincos(angle: float) -> Tuple[float, float]:
+    """Returns sine and cosine of angle given in degrees.
+
+    Shapes of a hatch are usually rotated by a few distinct angles, so these are memoized.
+    """
+    angle = math.radians(angle)
+    return math.sin(angle), math.cos(angle)
+
+
 class Shape(ABC):
     """A class for Shape that is being drawed on the canvas."""
 
@@ -20,13 +31,23 @@ class Shape(ABC):
     dy_mm: int = 3
     line_width = 0.1
 
-    def __init__(self):
-        self.points = tuple(self.__resize__())
+    def __init_subclass__(cls, **kwargs):
+        """Resizes points of the shape class once, when the class is defined.
 
-    def __resize__(self) -> Generator[Tuple[float, float], None, None]:
+        Points given in the class body are kept as unit points, so subclasses that change only
+        the size resize the same unit points.
+        """
+        super().__init_subclass__(**kwargs)
+        if "points" in cls.__dict__:
+            cls.unit_points = cls.points
+        if hasattr(cls, "unit_points"):
+            cls.points = tuple(cls.__resize__(cls.unit_points, cls.size))
+
+    @staticmethod
+    def __resize__(points, size) -> Generator[Tuple[float, float], None, None]:
         """Resize points."""
-        for x, y in self.points:
-            yield x * self.size, y * self.size
+        for x, y in points:
+            yield x * size, y * size
 
     def __scale__(self, points, scale) -> Generator[Tuple[float, float], None, None]:
         """Resize points."""
@@ -46,9 +67,7 @@ class Shape(ABC):
             Tuple of coordinates for each point.
         """
         # pylint: disable=no-self-use
-        angle = math.radians(angle)
-        sin = math.sin(angle)
-        cos = math.cos(angle)
+        sin, cos = _sincos(angle)
 
         for x, y in points:
             new_x = x * cos - y * sin
@@ -73,6 +92,38 @@ class Shape(ABC):
         for x, y in points:
             yield x + dx, y + dy
 
+    def __transform__(
+        self,
+        points: Iterable,
+        angle: float,
+        scale: float,
+        position: Tuple[float, float],
+    ) -> Tuple[Tuple[float, float], ...]:
+        """Rotate, scale and move points in one pass.
+
+        Gives the same result as `__rotate__`, `__scale__` and `__translate__` chained together.
+
+        Args:
+            points: points to transform.
+            angle: angle of rotation in degrees.
+            scale: scale factor.
+            position: new coordinates of the shape.
+
+        Returns:
+            Tuple of transformed points.
+        """
+        # pylint: disable=no-self-use
+        sin, cos = _sincos(angle)
+        dx, dy = position
+
+        # list comprehension is materialized faster than a generator passed to tuple
+        return tuple(
+            [
+                ((x * cos - y * sin) * scale + dx, (x * sin + y * cos) * scale + dy)
+                for x, y in points
+            ]
+        )
+
     def scale_back(
         self, points: Iterable, canvas_unit: CanvasUnitLinked
     ) -> Generator[Tuple[float, float], None, None]:
@@ -86,8 +137,7 @@ class Shape(ABC):
             List of translated points.
         """
         # pylint: disable=no-self-use
-        for x, y in points:
-            yield canvas_unit.scale(x, y)
+        yield from canvas_unit.scale_points(points)
 
     def draw(
         self,
@@ -110,16 +160,61 @@ class Shape(ABC):
             position = tuple(self.scale_back([position], canvas_unit))[0]
             polygon = tuple(self.scale_back(polygon, canvas_unit))
 
-        points = self.__rotate__(self.points, angle)
-        points = self.__scale__(points, scale)
-        points = self.__translate__(points, position)
-        points = tuple(points)
+        self.draw_mm(position, angle, canvas_unit, polygon, color=color, scale=scale)
+
+    def draw_mm(
+        self,
+        position: Tuple[float, float],
+        angle: float,
+        canvas_unit: CanvasUnitLinked,
+        polygon=None,
+        color=Color.BLACK,
+        scale=1,
+        seed_position=None,
+    ) -> None:
+        """Draws shape at given position given in mm of the canvas unit.
+
+        Unlike `draw`, position and polygon are not scaled, so the scaling can be done once for
+        all shapes. `seed_position` is the position before scaling, it is used by shapes picked
+        at random.
+        """
+        # pylint: disable=unused-argument
+        points = self.__transform__(self.points, angle, scale, position)
 
         if polygon:
             canvas_unit.draw_lines_inside_polygon(polygon, points, width=self.line_width*scale, color=color)
         else:
             canvas_unit.draw_lines(points, width=self.line_width*scale, color=color)
 
+    def draw_many(
+        self,
+        positions: Iterable[Tuple[float, float]],
+        angles: Iterable[float],
+        canvas_unit: CanvasUnitLinked,
+        polygon=None,
+        color=Color.BLACK,
+        scale=1,
+        seed_positions=None,
+    ) -> None:
+        """Draws shapes at many positions given in mm of the canvas unit.
+
+        Same as `draw_mm` called for each position and angle, but arguments shared by all shapes
+        are prepared once.
+        """
+        # pylint: disable=too-many-arguments,unused-argument
+        transform, points = self.__transform__, self.points
+        width = self.line_width * scale
+
+        if polygon:
+            draw_lines_inside_polygon = canvas_unit.draw_lines_inside_polygon
+            for position, angle in zip(positions, angles):
+                points_mm = transform(points, angle, scale, position)
+                draw_lines_inside_polygon(polygon, points_mm, width=width, color=color)
+        else:
+            draw_lines = canvas_unit.draw_lines
+            for position, angle in zip(positions, angles):
+                draw_lines(transform(points, angle, scale, position), width=width, color=color)
+
 
 def create_shape_for_rock_and_aggregate(rock_shape, aggregate_shape):
     # return MultiShape(shapes = (rock_shape, rock_shape, aggregate_shape))
@@ -135,7 +230,15 @@ class MultiShape(Shape):
     def __init__(self, shapes=None):
         if shapes:
             self.shapes = shapes
-        self.iterator = cycle(self.shapes)
+        # index of the next shape to draw, shapes are drawn one after another in a loop
+        self._i = 0
+        self._n = len(self.shapes)
+
+    def _next_shape(self) -> Shape:
+        """Returns next shape to draw."""
+        shape = self.shapes[self._i % self._n]
+        self._i += 1
+        return shape
 
     def draw(
         self,
@@ -154,9 +257,60 @@ class MultiShape(Shape):
             canvas_unit: Unit that draws the shape
             polygon: Polygon to draw shapes only inside.
         """
-        shape = next(self.iterator)
+        shape = self._next_shape()
         shape.draw(position, angle, canvas_unit, polygon, color=color, scale=scale)
 
+    def draw_mm(
+        self,
+        position: Tuple[float, float],
+        angle: float,
+        canvas_unit: CanvasUnitLinked,
+        polygon=None,
+        color=None,
+        scale=1,
+        seed_position=None,
+    ) -> None:
+        """Draws shape at given position given in mm of the canvas unit."""
+        shape = self._next_shape()
+        shape.draw_mm(
+            position,
+            angle,
+            canvas_unit,
+            polygon,
+            color=color,
+            scale=scale,
+            seed_position=seed_position,
+        )
+
+    def draw_many(
+        self,
+        positions: Iterable[Tuple[float, float]],
+        angles: Iterable[float],
+        canvas_unit: CanvasUnitLinked,
+        polygon=None,
+        color=None,
+        scale=1,
+        seed_positions=None,
+    ) -> None:
+        """Draws shapes at many positions given in mm of the canvas unit.
+
+        Shapes are picked for each position one by one, as in `draw_mm`.
+        """
+        # pylint: disable=too-many-arguments
+        if seed_positions is None:
+            seed_positions = positions
+        draw_mm = self.draw_mm
+        for position, angle, seed_position in zip(positions, angles, seed_positions):
+            draw_mm(
+                position,
+                angle,
+                canvas_unit,
+                polygon,
+                color=color,
+                scale=scale,
+                seed_position=seed_position,
+            )
+
 
 class RandomMultiShape(MultiShape):
 
@@ -177,6 +331,36 @@ class RandomMultiShape(MultiShape):
                 color=color,
                 scale=scale)
 
+    def draw_mm(
+        self,
+        position: Tuple[float, float],
+        angle: float,
+        canvas_unit: CanvasUnitLinked,
+        polygon=None,
+        color=None,
+        scale=1,
+        seed_position=None,
+    ) -> None:
+        """Draws shape at given position given in mm of the canvas unit.
+
+        Shape is picked by the position before scaling as in `draw`, so scaling does not change
+        the drawing.
+        """
+        if seed_position is None:
+            seed_position = position
+        seed = int(seed_position[0] * 10000 + seed_position[1]*10)
+        random.seed(seed)
+        shape = random.choice(self.shapes)
+        shape.draw_mm(
+            position,
+            angle,
+            canvas_unit,
+            polygon=polygon,
+            color=color,
+            scale=scale,
+            seed_position=seed_position,
+        )
+
 
 class Glina(Shape):
     """Shape for il in gashura."""
@@ -0,0 +1,31 @@
+"""Tests for Canvas."""
+
+from canvas import Canvas
+from canvas.canvas_units import CanvasUnitFloating
+
+
+class Unit(CanvasUnitFloating):
+    name = "u"
+
+    def draw(self):
+        pass
+
+
+def test_add_names_duplicates_with_pluses(tmp_path):
+    canvas = Canvas("A3", str(tmp_path / "out"), "dxf")
+    units = [Unit() for _ in range(3)]
+    for unit in units:
+        canvas.add(unit)
+
+    assert list(canvas.units) == ["u", "u+", "u++"]
+    assert [canvas.units[name] for name in canvas.units] == units
+
+
+def test_add_skips_names_taken_explicitly(tmp_path):
+    canvas = Canvas("A3", str(tmp_path / "out"), "dxf")
+    canvas.add(Unit())
+    canvas.add(Unit(), name="u+")
+    canvas.add(Unit())
+    canvas.add(Unit(), name="u+")
+
+    assert list(canvas.units) == ["u", "u+", "u++", "u+++"]
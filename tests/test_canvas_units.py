@@ -0,0 +1,79 @@
+"""Tests for drawing lines by canvas units."""
+
+import numpy as np
+import pytest
+
+from canvas.canvas_units import SMALL_LINE_SIZE, CanvasUnitFloating, CanvasUnitScaled
+
+CONTAINERS = [list, tuple, iter, np.array, lambda points: (point for point in points)]
+
+
+class RecordingCanvas:
+    """Canvas that records lines instead of drawing them."""
+
+    def __init__(self):
+        self.lines = []
+
+    def draw_lines_canvas_mm(self, points, **kwargs):
+        self.lines.append(points)
+
+
+class Unit(CanvasUnitFloating):
+    origin = (10, 20)
+
+    def __init__(self):
+        self.canvas = RecordingCanvas()
+
+    def draw(self):
+        pass
+
+
+def get_points(size):
+    return [(float(i), float(2 * i)) for i in range(size)]
+
+
+def assert_list_of_tuples(points):
+    assert isinstance(points, list)
+    for point in points:
+        assert type(point) is tuple and all(type(value) is float for value in point)
+
+
+@pytest.mark.parametrize("size", [2, SMALL_LINE_SIZE + 5])
+@pytest.mark.parametrize("container", CONTAINERS)
+def test_draw_lines_passes_list_of_tuples(size, container):
+    unit = Unit()
+    unit.draw_lines(container(get_points(size)))
+    (points,) = unit.canvas.lines
+    assert points == [(x + 10, y + 20) for x, y in get_points(size)]
+    assert_list_of_tuples(points)
+
+
+class ScaledUnit(CanvasUnitScaled, Unit):
+    scale_horizontal = 500
+    scale_vertical = 250
+    x_offset_m = 1
+    y_offset_m = -2
+
+    def __init__(self):
+        super().__init__()
+        self.__post_init__()
+
+
+@pytest.mark.parametrize("size", [2, SMALL_LINE_SIZE + 5])
+@pytest.mark.parametrize("container", CONTAINERS)
+def test_draw_lines_m_passes_list_of_tuples(size, container):
+    unit = ScaledUnit()
+    unit.draw_lines_m(container(get_points(size)))
+    (points,) = unit.canvas.lines
+    expected = [(2 * (x + 1) + 10, 4 * (y - 2) + 20) for x, y in get_points(size)]
+    assert points == pytest.approx(expected)
+    assert_list_of_tuples(points)
+
+
+@pytest.mark.parametrize("size", [2, SMALL_LINE_SIZE + 5])
+@pytest.mark.parametrize("container", CONTAINERS)
+def test_scale_points(size, container):
+    unit = ScaledUnit()
+    points = unit.scale_points(container(get_points(size)))
+    assert points == [unit.scale(x, y) for x, y in get_points(size)]
+    assert_list_of_tuples(points)
@@ -0,0 +1,95 @@
+"""Tests for clipping of lines with rectangles and polygons."""
+
+import random
+
+import numpy as np
+import pyclipper
+import pytest
+
+from canvas.clipping import (
+    ClipBatch,
+    _clip_lines_with_pyclipper,
+    clip_line_with_rectangle,
+    clip_lines,
+)
+
+BBOX = (0, 0, 10, 10)
+RECTANGLE = ((0, 0), (0, 10), (10, 10), (10, 0))
+HEXAGON = ((2, 0), (0, 5), (2, 10), (8, 10), (10, 5), (8, 0))
+
+
+def clip_with_pyclipper(line, polygon=RECTANGLE):
+    clip_path = tuple(map(tuple, pyclipper.scale_to_clipper(polygon)))
+    return [part.tolist() for part in _clip_lines_with_pyclipper([clip_path], [line])]
+
+
+def get_segments(parts):
+    """Returns undirected segments of the parts, as pyclipper may reverse them."""
+    segments = set()
+    for part in parts:
+        nodes = [(round(x, 6), round(y, 6)) for x, y in part]
+        for start, end in zip(nodes, nodes[1:]):
+            segments.add(tuple(sorted((start, end))))
+    return segments
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_clip_line_with_rectangle_as_pyclipper(seed):
+    rnd = random.Random(seed)
+    line = [(rnd.uniform(-5, 15), rnd.uniform(-5, 15)) for _ in range(rnd.randint(2, 6))]
+
+    assert get_segments(clip_line_with_rectangle(line, BBOX)) == get_segments(
+        clip_with_pyclipper(line)
+    )
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        [(10, 5), (12, 5)],
+        [(10, 10), (12, 12)],
+        [(0, -1), (0, 11)],
+        [(-1, 0), (11, 0)],
+    ],
+)
+def test_clip_line_touching_rectangle(line):
+    assert clip_line_with_rectangle(line, BBOX) == []
+    assert clip_with_pyclipper(line) == []
+
+
+def test_clip_line_shrinking_to_point():
+    assert clip_line_with_rectangle([(5, 5), (5, 5), (5, 5)], BBOX) == []
+    assert clip_line_with_rectangle([(5, 5), (5, 5), (6, 5)], BBOX) == [[(5, 5), (5, 5), (6, 5)]]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_clip_lines_with_convex_polygon_as_pyclipper(seed):
+    rnd = random.Random(seed)
+    # short lines are likely to be entirely inside the polygon and skip pyclipper
+    x, y, size = rnd.uniform(-2, 12), rnd.uniform(-2, 12), rnd.choice((1, 10))
+    line = [
+        (x + rnd.uniform(0, size), y + rnd.uniform(0, size)) for _ in range(rnd.randint(2, 6))
+    ]
+
+    assert get_segments(clip_lines(HEXAGON, [line])) == get_segments(
+        clip_with_pyclipper(line, HEXAGON)
+    )
+
+
+@pytest.mark.parametrize("polygon", [RECTANGLE, HEXAGON])
+def test_clip_lines_drops_zero_length_lines(polygon):
+    assert clip_lines(polygon, [[(5, 5)], [(5, 5), (5, 5)], [(20, 5), (20, 5)]]) == []
+
+
+def test_clip_batch_with_numpy_polygons():
+    calls = []
+
+    def draw(owner, polygon, lines, **kwargs):
+        calls.append(len(lines))
+
+    batch = ClipBatch()
+    for _ in range(2):
+        batch.add(draw, None, np.array(RECTANGLE), [(1, 1), (2, 2)], {})
+    batch.add(draw, None, np.array(RECTANGLE) + 1, [(1, 1), (2, 2)], {})
+    batch.flush()
+    assert calls == [2, 1]
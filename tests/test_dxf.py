@@ -0,0 +1,16 @@
+"""Tests for CanvasDxf backend."""
+
+from canvas.dxf import CanvasDxf
+from canvas.dxf_hatch_patterns import PATTERNS
+
+
+def test_draw_lines_with_pattern_added_after_creation(tmp_path):
+    backend = CanvasDxf(str(tmp_path / "out.dxf"), patterns=dict(PATTERNS))
+    backend.patterns["NEW"] = {**PATTERNS["SLAN"], "angle": 30}
+
+    backend.draw_lines(((0, 0), (0, 10), (10, 10)), pattern="NEW")
+    backend.draw_lines(((0, 0), (0, 10), (10, 10)), pattern="SLAN")
+
+    hatches = backend.msp.query("HATCH")
+    assert [hatch.dxf.pattern_name for hatch in hatches] == ["NEW", "SLAN"]
+    assert [hatch.dxf.pattern_angle for hatch in hatches] == [30, 45]
@@ -0,0 +1,48 @@
+"""Tests for loading of hatch patterns."""
+
+import os
+
+from canvas.dxf_utils import build_pattern_index, load_patterns_from_dir, write_pattern
+
+
+def write_patterns(path, **angles):
+    for name, angle in angles.items():
+        write_pattern(os.path.join(path, f"{name}.txt"), {"name": name, "angle": angle})
+
+
+def set_mtime(filename, mtime):
+    os.utime(filename, (mtime, mtime))
+
+
+def test_load_patterns_from_index(tmp_path):
+    write_patterns(tmp_path, A=0, B=45)
+    build_pattern_index(tmp_path)
+    # the file is older than the index, so the index is up to date and is read instead of it
+    write_patterns(tmp_path, B=30)
+    set_mtime(tmp_path / "B.txt", os.path.getmtime(tmp_path / "patterns.pkl") - 1)
+
+    assert load_patterns_from_dir(str(tmp_path)) == {"A": {"angle": 0}, "B": {"angle": 45}}
+
+
+def test_load_patterns_with_changed_file(tmp_path):
+    write_patterns(tmp_path, A=0, B=45)
+    build_pattern_index(tmp_path)
+    write_patterns(tmp_path, B=30)
+    set_mtime(tmp_path / "B.txt", os.path.getmtime(tmp_path / "patterns.pkl") + 1)
+
+    assert load_patterns_from_dir(str(tmp_path)) == {"A": {"angle": 0}, "B": {"angle": 30}}
+
+
+def test_load_patterns_with_added_file(tmp_path):
+    write_patterns(tmp_path, A=0)
+    build_pattern_index(tmp_path)
+    write_patterns(tmp_path, B=45)
+    set_mtime(tmp_path / "B.txt", 0)
+
+    assert load_patterns_from_dir(str(tmp_path)) == {"A": {"angle": 0}, "B": {"angle": 45}}
+
+
+def test_load_patterns_without_index(tmp_path):
+    write_patterns(tmp_path, A=0)
+
+    assert load_patterns_from_dir(str(tmp_path)) == {"A": {"angle": 0}}
@@ -0,0 +1,77 @@
+"""Tests for filling of polygons with hatches and shapes of rocks."""
+
+import os
+import subprocess
+import sys
+
+from canvas import gashura_helper
+from canvas.canvas import LineType
+from canvas.canvas_units import CanvasUnitFloating
+from canvas.gashura_helper import (
+    ROCK_FROM_NAME,
+    Rock,
+    fill_polygon_with_lines_diagonal,
+    get_rock_shape,
+)
+
+
+class RecordingUnit(CanvasUnitFloating):
+    """Unit that records drawn lines instead of drawing them."""
+
+    origin = (0, 0)
+
+    def __init__(self):
+        self.lines = []
+
+    def draw(self):
+        pass
+
+    def draw_lines_bulk(self, lines, line_type=LineType.SOLID, **kwargs):
+        self.lines += [(line_type, [tuple(point) for point in points]) for points in lines]
+
+
+def test_diagonal_lines_with_alternating_line_type_are_interleaved():
+    polygon = ((5, 5), (5, 60), (30, 70), (60, 40), (40, 30), (70, 10))
+    unit = RecordingUnit()
+    fill_polygon_with_lines_diagonal(unit, polygon, (5, 70, 5, 70), alter_linetype=True)
+
+    # lines go at 45 degrees, so y - x of any node is the offset of its line
+    offsets = [round(points[0][1] - points[0][0], 6) for _, points in unit.lines]
+    assert offsets == sorted(offsets)
+    line_types = {}
+    for offset, (line_type, _) in zip(offsets, unit.lines):
+        line_types.setdefault(offset, line_type)
+    line_types = list(line_types.values())
+    assert line_types[0::2] == [line_types[0]] * len(line_types[0::2])
+    assert line_types[1::2] == [line_types[1]] * len(line_types[1::2])
+    assert {line_types[0], line_types[1]} == {LineType.SOLID, LineType.DASH}
+
+
+def test_rock_shapes_are_created_on_first_access():
+    code = (
+        "import sys; from canvas import gashura_helper; "
+        "assert 'canvas.shapes' not in sys.modules; "
+        "gashura_helper.rock_shapes; "
+        "assert 'canvas.shapes' in sys.modules"
+    )
+    src = os.path.join(os.path.dirname(__file__), "..", "src")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=src)
+
+
+def test_get_rock_shape_by_rock_and_by_name():
+    rock_shapes = gashura_helper.rock_shapes
+    assert set(rock_shapes) == set(ROCK_FROM_NAME)
+    for name, rock in ROCK_FROM_NAME.items():
+        assert get_rock_shape(rock) is rock_shapes[name]
+        assert get_rock_shape(name) is rock_shapes[name]
+    assert set(ROCK_FROM_NAME.values()) == set(Rock)
+    assert get_rock_shape("неизвестно") is None
+
+
+def test_rock_shapes_keep_registered_shapes(monkeypatch):
+    assert gashura_helper.rock_shapes is gashura_helper.rock_shapes
+
+    shape = gashura_helper.rock_shapes["песок"]
+    monkeypatch.setitem(gashura_helper.rock_shapes, "новая порода", shape)
+    assert gashura_helper.rock_shapes["новая порода"] is shape
+    assert get_rock_shape("новая порода") is shape
@@ -0,0 +1,113 @@
+"""Tests for CanvasCairo backend."""
+
+from collections import OrderedDict
+
+import pytest
+
+cairo = pytest.importorskip("cairo")
+
+# pylint: disable=wrong-import-position
+from canvas.backend import Color  # noqa: E402
+from canvas.pdf_via_cairo import iterate_over_segments_width, wrap_text  # noqa: E402
+from canvas.png import CanvasPng  # noqa: E402
+
+SIZE_MM = 20
+BLACK = (0, 0, 0, 255)
+RED = (0, 0, 255, 255)
+
+
+@pytest.fixture(name="backend")
+def fixture_backend(tmp_path):
+    backend = CanvasPng(str(tmp_path / "out.png"), width_in_mm=SIZE_MM, height_in_mm=SIZE_MM)
+    backend.__pre_draw__()
+    return backend
+
+
+def get_pixel(surface, x_mm, y_mm):
+    """Returns blue, green, red and alpha of the pixel under the point given in mm."""
+    surface.flush()
+    x = int(x_mm / SIZE_MM * surface.get_width())
+    y = int((SIZE_MM - y_mm) / SIZE_MM * surface.get_height())
+    offset = y * surface.get_stride() + x * 4
+    return tuple(surface.get_data()[offset : offset + 4])
+
+
+def test_draw_lines_without_color_is_stroked_black(backend):
+    backend.draw_lines(((2, 10), (18, 10)), color=None, width=1)
+    assert get_pixel(backend.surface, 10, 10) == BLACK
+
+
+def test_draw_lines_bulk_without_color_is_stroked_black(backend):
+    backend.draw_lines_bulk([((2, 10), (18, 10)), ((10, 2), (10, 8))], color=None, width=1)
+    assert get_pixel(backend.surface, 10, 10) == BLACK
+    assert get_pixel(backend.surface, 10, 5) == BLACK
+
+
+def test_draw_lines_with_fill_and_without_color_is_not_stroked(backend):
+    backend.draw_lines(((5, 5), (5, 15), (15, 15), (15, 5)), color=None, fill=Color.RED, width=2)
+    assert get_pixel(backend.surface, 10, 10) == RED
+    # the stroke would cover the corner of the square outside of it
+    assert get_pixel(backend.surface, 4.5, 15.5)[3] == 0
+
+
+class StubContext:
+    """Context measuring every character as 1 wide and non-empty text as 2 high."""
+
+    def __init__(self):
+        self.measured = []
+
+    def text_extents(self, text):
+        self.measured.append(text)
+        height = 2 if text else 0
+        return 0, -height, len(text), height, len(text), 0
+
+    def select_font_face(self, font_face):
+        pass
+
+    def set_font_size(self, font_size):
+        pass
+
+
+class TextRecorder:
+    """Backend stand-in that records lines of text drawn through `wrap_text`."""
+
+    def __init__(self):
+        self.ctx = StubContext()
+        self.font_key = None
+        self._text_extents_cache = OrderedDict()
+        self.lines = []
+
+    @wrap_text
+    def draw_text(self, origin, text, **kwargs):
+        self.lines.append((origin, text))
+
+
+def test_iterate_over_segments_width():
+    segments = list(iterate_over_segments_width("aaa bb cccc d", 7, StubContext()))
+    # widths of words and spaces are summed up, segments have no leading spaces
+    assert segments == [("aaa bb", 2), ("cccc d", 2)]
+
+
+def test_iterate_over_segments_width_with_long_word():
+    segments = list(iterate_over_segments_width("aaaaaaaaaa bb", 7, StubContext()))
+    assert segments == [("aaaaaaaaaa", 2), ("bb", 2)]
+
+
+def test_wrap_text_with_multiple_lines():
+    recorder = TextRecorder()
+    recorder.draw_text((5, 20), "aaa bb cccc\ndd", wrap_width=7)
+    assert recorder.lines == [((5, 20), "aaa bb"), ((5, 18), "cccc"), ((5, 16), "dd")]
+
+
+def test_wrap_text_with_empty_text():
+    recorder = TextRecorder()
+    recorder.draw_text((5, 20), "", wrap_width=7)
+    recorder.draw_text((5, 10), "")
+    assert recorder.lines == [((5, 20), ""), ((5, 10), "")]
+
+
+def test_wrap_text_measures_words_once():
+    recorder = TextRecorder()
+    for _ in range(3):
+        recorder.draw_text((5, 20), "aaa bb aaa", wrap_width=20)
+    assert sorted(recorder.ctx.measured) == [" ", "aaa", "bb"]
@@ -0,0 +1,54 @@
+"""Tests for CanvasPng backend."""
+
+import os
+
+import numpy as np
+import pytest
+
+cairo = pytest.importorskip("cairo")
+
+# pylint: disable=wrong-import-position
+from canvas.backend import Color  # noqa: E402
+from canvas.png import CanvasPng, get_trim_box  # noqa: E402
+
+POINTS_PER_MM = 72 / 25.4
+
+
+def get_pixels(surface):
+    """Returns (height, width, 4) array of blue, green, red and alpha of the surface."""
+    surface.flush()
+    width, height = surface.get_width(), surface.get_height()
+    pixels = np.frombuffer(surface.get_data(), dtype=np.uint8)
+    return pixels.reshape(height, surface.get_stride() // 4, 4)[:, :width]
+
+
+def test_get_trim_box():
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 20, 10)
+    context = cairo.Context(surface)
+    context.set_source_rgb(1, 1, 1)
+    context.paint()
+    context.set_source_rgb(0, 0, 0)
+    context.rectangle(5, 3, 4, 2)
+    context.fill()
+
+    assert get_trim_box(surface) == (5, 3, 4, 2)
+
+
+def test_get_trim_box_of_blank_surface():
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 20, 10)
+    assert get_trim_box(surface) == (0, 0, 20, 10)
+
+
+def test_save_to_file_trims_and_flattens_image(tmp_path):
+    output_file = tmp_path / "out.png"
+    backend = CanvasPng(str(output_file), width_in_mm=100, height_in_mm=100)
+    backend.__pre_draw__()
+    backend.draw_rectangle((10, 10), (60, 40), fill_color=Color.RED)
+    backend.save_to_file()
+
+    assert os.listdir(tmp_path) == ["out.png"]
+    image = cairo.ImageSurface.create_from_png(str(output_file))
+    assert image.get_width() == pytest.approx(60 * POINTS_PER_MM, abs=2)
+    assert image.get_height() == pytest.approx(40 * POINTS_PER_MM, abs=2)
+    # drawing is flattened on white background and the watermark does not make it transparent
+    assert (get_pixels(image)[..., 3] == 255).all()